@@ -3,37 +3,269 @@ API router definition
 
 - upload
     - upload/img
+    - upload/imgs
     - upload/text
     - upload/patch (future)
 - download -> .ics 
 - health_check
 """
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Query
-from fastapi.responses import StreamingResponse
-from typing import Optional
+from fastapi import APIRouter, Request, UploadFile, File, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from typing import Optional, List, Iterator
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import hashlib
+import itertools
 import logging
-from datetime import datetime
+import os
+import threading
+import time
 
 from app.services.ocr_service import get_ocr_service
-from app.models.event import EventData, ICSDownloadRequest
+from app.services.parser_service import parse_text_cached, today_in
+from app.services.ics_service import get_ics_service
+from app.models.event import Event, ICSDownloadRequest, TextParseRequest
+from app.models.response import (
+    OCRResponse,
+    OCRFileResult,
+    BatchOCRResponse,
+    TextParseResponse,
+    HealthCheckResponse,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+_ocr_worker_ids = itertools.count()
+
+
+def _pin_ocr_worker() -> None:
+    """
+    Pin each OCR worker thread to its own core (Linux only)
+    
+    Child processes inherit the affinity of the thread that spawns them, so
+    with OMP_THREAD_LIMIT=1 every tesseract run stays on the core of its
+    worker instead of migrating between cores.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    cpus = sorted(os.sched_getaffinity(0))
+    cpu = cpus[next(_ocr_worker_ids) % len(cpus)]
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        logger.warning("Unable to pin OCR worker to CPU %d: %s", cpu, e)
+
+
+# OCR worker pool: pytesseract runs every call in its own tesseract process,
+# so worker threads only wait on subprocesses and one per core scales linearly
+_ocr_executor = ThreadPoolExecutor(
+    max_workers=os.cpu_count(),
+    thread_name_prefix="ocr",
+    initializer=_pin_ocr_worker
+)
+
+# Upper bound on OCR jobs in flight across all requests, one per core by
+# default to match the worker pool
+_OCR_MAX_CONCURRENCY = int(os.getenv("OCR_MAX_CONCURRENCY", str(os.cpu_count() or 4)))
+_OCR_SEM = asyncio.Semaphore(_OCR_MAX_CONCURRENCY)
+
+# Errors worth retrying: the tesseract subprocess could not be spawned
+# (EAGAIN / EINTR), as opposed to a bad image. No tesseract timeout is set,
+# so there is no timeout error to retry
+_TRANSIENT_OCR_ERRORS = (BlockingIOError, InterruptedError)
+_OCR_RETRIES = 3
+_OCR_RETRY_DELAY = 0.5
+
+
+class AsyncRateLimiter:
+    """
+    Minimal interval-based rate limiter
+
+    Args:
+        rate: max calls started per second, <= 0 disables limiting
+    """
+
+    def __init__(self, rate: float):
+        self.min_interval = 1.0 / rate if rate > 0 else 0.0
+        self.last_ts = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.min_interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self.last_ts + self.min_interval - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+                now += delay
+            self.last_ts = now
+
+
+_ocr_rate_limiter = AsyncRateLimiter(float(os.getenv("OCR_RPS", "0")))
+
+
+async def _run_ocr(func, *args):
+    """
+    Run a blocking OCR call on the OCR executor
+
+    Concurrency is bounded by _OCR_SEM and start rate by OCR_RPS;
+    transient failures are retried with exponential backoff.
+    """
+    loop = asyncio.get_running_loop()
+    delay = _OCR_RETRY_DELAY
+    
+    async with _OCR_SEM:
+        for attempt in range(1, _OCR_RETRIES + 1):
+            await _ocr_rate_limiter.wait()
+            try:
+                return await loop.run_in_executor(_ocr_executor, func, *args)
+            except Exception as e:
+                cause = e.__cause__ or e
+                if attempt == _OCR_RETRIES or not isinstance(cause, _TRANSIENT_OCR_ERRORS):
+                    raise
+                logger.warning("OCR attempt %d failed, retrying in %ss: %s", attempt, delay, e)
+                await asyncio.sleep(delay)
+                delay *= 2
+
+
+# Magic numbers of the image formats tesseract reads
+_IMAGE_SIGNATURES = (
+    b"\x89PNG\r\n\x1a\n",  # PNG
+    b"\xff\xd8\xff",         # JPEG
+    b"BM",                   # BMP
+    b"II*\x00",              # TIFF (little-endian)
+    b"MM\x00*",              # TIFF (big-endian)
+    b"GIF87a",               # GIF
+    b"GIF89a",
+)
+
+
+# Upload size limits: a single image, and a whole multipart request
+_MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(20 * 1024 * 1024)))
+_MAX_BATCH_BYTES = int(os.getenv("MAX_BATCH_BYTES", str(100 * 1024 * 1024)))
+# Room for multipart boundaries and part headers on top of a single image,
+# so an image right at the limit is not refused by the body-size check
+_MULTIPART_OVERHEAD = 64 * 1024
+
+
+def _check_content_length(request: Request, limit: int) -> None:
+    """
+    Reject a request whose declared body size exceeds the limit (413)
+    
+    Starlette spools multipart parts to disk, so this bounds disk usage and
+    OCR work rather than memory; a missing header falls through to the
+    per-file checks.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > limit:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Request too large, limit is {limit} bytes"
+        )
+
+
+async def _is_supported_image(file: UploadFile) -> bool:
+    """
+    Check the file header against known image signatures
+    
+    A 12-byte read is enough to reject non-images before they reach OCR.
+    """
+    head = await file.read(12)
+    await file.seek(0)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return True
+    return head.startswith(_IMAGE_SIGNATURES)
+
+
+def _ocr_success(file: UploadFile, text: str) -> OCRFileResult:
+    return OCRFileResult(
+        filename=file.filename,
+        success=True,
+        text=text,
+        length=len(text),
+        message="OCR success" if text else "Unable to detect text"
+    )
+
+
+def _ocr_failure(file: UploadFile, message: str) -> OCRFileResult:
+    return OCRFileResult(
+        filename=file.filename,
+        success=False,
+        text="",
+        length=0,
+        message=message
+    )
+
+
+# Recently generated calendars keyed by a hash of the download request, so
+# repeated downloads of the same event list skip regeneration
+_ICS_CACHE_SIZE = int(os.getenv("ICS_CACHE_SIZE", "128"))
+# Larger calendars are streamed without being kept, so neither one response
+# nor the whole cache holds more than this many bytes per entry
+_ICS_CACHE_MAX_BYTES = int(os.getenv("ICS_CACHE_MAX_BYTES", str(256 * 1024)))
+_ics_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_ics_cache_lock = threading.Lock()
+
+
+def _ics_cache_get(key: str) -> Optional[bytes]:
+    with _ics_cache_lock:
+        content = _ics_cache.get(key)
+        if content is not None:
+            _ics_cache.move_to_end(key)
+        return content
+
+
+def _cache_ics_chunks(key: str, chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """
+    Pass generated chunks through, caching the calendar once it is complete
+    
+    Chunks are only collected while the total stays within
+    _ICS_CACHE_MAX_BYTES; past that the rest is streamed uncached.
+    """
+    if _ICS_CACHE_SIZE <= 0:
+        yield from chunks
+        return
+    
+    parts = []
+    size = 0
+    for chunk in chunks:
+        if parts is not None:
+            size += len(chunk)
+            if size > _ICS_CACHE_MAX_BYTES:
+                parts = None
+            else:
+                parts.append(chunk)
+        yield chunk
+    
+    if parts is not None:
+        # StreamingResponse drives sync iterators from a worker thread
+        with _ics_cache_lock:
+            _ics_cache[key] = b"".join(parts)
+            while len(_ics_cache) > _ICS_CACHE_SIZE:
+                _ics_cache.popitem(last=False)
+
 
 # ===== API =====
 
-@router.post("/api/upload/img")
+@router.post("/api/upload/img", response_model=OCRResponse)
 async def upload_img(
+    request: Request,
     file: UploadFile = File(...),
-    lang: Optional[str] = Query("chi_sim+eng", description="OCR Language")
+    lang: Optional[str] = Query("chi_sim+eng", description="OCR Language"),
+    psm: Optional[int] = Query(None, ge=0, le=13, description="Tesseract page segmentation mode"),
+    oem: Optional[int] = Query(None, ge=0, le=3, description="Tesseract OCR engine mode")
 ):
     """
     Args:
         file: PNG, JPG, JPEG, BMP, TIFF
         lang: deafult: chi_sim+eng
+        psm: default: 6 (uniform block of text), 7 for a single line
+        oem: default: 1 (LSTM only)
         
     Returns:
         {
@@ -52,31 +284,41 @@ async def upload_img(
         ```
     """
     try:
-        # file type check
-        if not file.content_type or not file.content_type.startswith("image/"):
+        # the body is the image plus multipart framing; file.size below is exact
+        _check_content_length(request, _MAX_IMAGE_BYTES + _MULTIPART_OVERHEAD)
+        
+        # UploadFile is already spooled by Starlette, OCR reads it in place
+        if not file.size:
+            raise HTTPException(status_code=400, detail="empty file")
+        
+        if file.size > _MAX_IMAGE_BYTES:
             raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type: {file.content_type}"
+                status_code=413,
+                detail=f"File too large, limit is {_MAX_IMAGE_BYTES} bytes"
             )
         
-        image_bytes = await file.read()
-        
-        if len(image_bytes) == 0:
-            raise HTTPException(status_code=400, detail="empty file")
+        # file type check by magic bytes, content_type is client-supplied
+        if not await _is_supported_image(file):
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported file type: {file.content_type}"
+            )
         
-        from app.services.ocr_service import OCRService
-        ocr_service = OCRService(lang=lang)
+        ocr_service = get_ocr_service(lang)
         
-        if not ocr_service.is_tesseract_available():
+        # once the TTL expires this spawns a tesseract probe, keep it off the event loop
+        if not await asyncio.to_thread(ocr_service.is_tesseract_available):
             raise HTTPException(
                 status_code=503,
                 detail="Tesseract OCR is not installed or unavaliable"
             )
 
-        text = ocr_service.extract_text_from_bytes(image_bytes)
+        # OCR 在线程池中执行，避免阻塞事件循环
+        config = ocr_service.build_config(psm, oem)
+        text = await _run_ocr(ocr_service.extract_text_from_file, file.file, config)
         
-        if not text or text.strip() == "":
-            logger.warning(f"Unable to detect text: {file.filename}")
+        if not text or text.isspace():
+            logger.warning("Unable to detect text: %s", file.filename)
             return {
                 "success": True,
                 "text": "",
@@ -85,7 +327,7 @@ async def upload_img(
                 "message": "Unable to detect text"
             }
         
-        logger.info(f"OCR success: {file.filename}, length: {len(text)}")
+        logger.info("OCR success: %s, length: %d", file.filename, len(text))
         
         return {
             "success": True,
@@ -98,73 +340,215 @@ async def upload_img(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"OCR failed: {str(e)}", exc_info=True)
+        logger.error("OCR failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"OCR failed: {str(e)}"
         )
 
-@router.post("/api/upload/text")
-async def upload_text(
-    text: str = Query(..., description="text content"),
-    lang: Optional[str] = Query("chi_sim+eng", description="OCR Language")
+@router.post("/api/upload/imgs", response_model=BatchOCRResponse)
+async def upload_imgs(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    lang: Optional[str] = Query("chi_sim+eng", description="OCR Language"),
+    psm: Optional[int] = Query(None, ge=0, le=13, description="Tesseract page segmentation mode"),
+    oem: Optional[int] = Query(None, ge=0, le=3, description="Tesseract OCR engine mode"),
+    include_combined: bool = Query(True, description="Include the joined text of all images")
 ):
     """
     Args:
-        text: plain text
+        files: PNG, JPG, JPEG, BMP, TIFF
         lang: deafult: chi_sim+eng
+        psm: default: 6 (uniform block of text), 7 for a single line
+        oem: default: 1 (LSTM only)
+        include_combined: default: true, false skips building combined_text
+        
+    Returns:
+        {
+            "success": bool,
+            "results": List[dict],
+            "combined_text": str | null,
+            "combined_length": int,
+            "total": int,
+            "successful_count": int,
+            "message": str
+        }
+        
+    Example:
+        ```bash
+        curl -X POST "http://localhost:8000/api/upload/imgs" \\
+             -F "files=@/path/to/image1.png" \\
+             -F "files=@/path/to/image2.png"
+        ```
+    """
+    try:
+        _check_content_length(request, _MAX_BATCH_BYTES)
+        
+        ocr_service = get_ocr_service(lang)
+        
+        # once the TTL expires this spawns a tesseract probe, keep it off the event loop
+        if not await asyncio.to_thread(ocr_service.is_tesseract_available):
+            raise HTTPException(
+                status_code=503,
+                detail="Tesseract OCR is not installed or unavaliable"
+            )
+        
+        config = ocr_service.build_config(psm, oem)
+        
+        # Validate first so only usable images reach tesseract
+        n_files = len(files)
+        results: List[Optional[OCRFileResult]] = [None] * n_files
+        pending: List[int] = []
+        for i, file in enumerate(files):
+            if not file.size:
+                results[i] = _ocr_failure(file, "empty file")
+            elif file.size > _MAX_IMAGE_BYTES:
+                results[i] = _ocr_failure(file, f"File too large, limit is {_MAX_IMAGE_BYTES} bytes")
+            elif not await _is_supported_image(file):
+                results[i] = _ocr_failure(file, f"Unsupported file type: {file.content_type}")
+            else:
+                pending.append(i)
+        
+        async def ocr_one(i: int) -> None:
+            file = files[i]
+            try:
+                text = await _run_ocr(ocr_service.extract_text_from_file, file.file, config)
+            except Exception as e:
+                logger.error("OCR failed: %s, %s", file.filename, e)
+                results[i] = _ocr_failure(file, f"OCR failed: {str(e)}")
+            else:
+                results[i] = _ocr_success(file, text)
+        
+        async def ocr_group(group: List[int]) -> None:
+            # One tesseract run for the whole group; if it fails, fall back to
+            # per-file OCR so a bad image only fails itself
+            if len(group) > 1:
+                try:
+                    texts = await _run_ocr(
+                        ocr_service.extract_text_from_files,
+                        [files[i].file for i in group],
+                        config
+                    )
+                except Exception as e:
+                    logger.warning("Batch OCR run failed, falling back to per-file OCR: %s", e)
+                else:
+                    for i, text in zip(group, texts):
+                        results[i] = _ocr_success(files[i], text)
+                    return
+            async with asyncio.TaskGroup() as tg:
+                for i in group:
+                    tg.create_task(ocr_one(i))
+        
+        # Split into as many groups as OCR jobs may run at once, so tesseract
+        # start-up is paid once per group while groups still run in parallel;
+        # results are written by index, so no ordering work is needed after
+        n_groups = min(len(pending), _OCR_MAX_CONCURRENCY)
+        async with asyncio.TaskGroup() as tg:
+            for g in range(n_groups):
+                tg.create_task(ocr_group(pending[g::n_groups]))
+        
+        # Length of the joined text is known from the per-file lengths, so
+        # clients that only need counts can skip the joined copy
+        lengths = [r.length for r in results if r.length]
+        combined_length = sum(lengths) + max(len(lengths) - 1, 0)
+        combined_text = None
+        if include_combined:
+            combined_text = '\n'.join(r.text for r in results if r.text)
+        successful_count = sum(1 for r in results if r.success)
+        
+        logger.info("Batch OCR finished: %d/%d succeeded", successful_count, n_files)
+        
+        return {
+            "success": successful_count > 0,
+            "results": results,
+            "combined_text": combined_text,
+            "combined_length": combined_length,
+            "total": n_files,
+            "successful_count": successful_count,
+            "message": f"{successful_count}/{n_files} images recognized"
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Batch OCR failed: %s", e, exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch OCR failed: {str(e)}"
+        )
+
+@router.post("/api/upload/text", response_model=TextParseResponse)
+async def upload_text(payload: TextParseRequest, response: Response):
+    """
+    Args:
+        payload: JSON body {"text": str, "timezone": str | null}
         
     Returns:
         {
             "success": bool,
             "events": List[dict],  
             "count": int,          
+            "timezone": str,
             "message": str
         }
     
+    Example:
+        ```bash
+        curl -X POST "http://localhost:8000/api/upload/text" \\
+             -H "Content-Type: application/json" \\
+             -d '{"text": "明天下午两点在会议室A开会", "timezone": "Asia/Shanghai"}'
+        ```
     """
     try:
+        text = payload.text
+        
         # 文本检查
-        if not text or text.strip() == "":
+        if not text or text.isspace():
             raise HTTPException(
                 status_code=400,
                 detail="Content cannot be empty"
             )
         
-        # 调用 parser_service 进行文本解析
-        from app.services.parser_service import ParserService
+        # 调用 parser_service 进行文本解析，同一天内重复提交的相同文本命中缓存;
+        # 解析是纯 CPU 的正则扫描，放到线程中执行，避免阻塞事件循环
+        today = today_in(payload.timezone)
+        events, cache_hit = await asyncio.to_thread(parse_text_cached, text, payload.timezone, today)
+        response.headers["X-Cache"] = "HIT" if cache_hit else "MISS"
         
-        parser = ParserService()
-        events = parser.parse_text_to_events(text)
-        
-        logger.info(f"文本解析成功: 识别到 {len(events)} 个事件")
+        logger.info("文本解析成功: 识别到 %d 个事件", len(events))
         
         return {
             "success": True,
             "events": [event.to_dict() for event in events],
             "count": len(events),
+            "timezone": payload.timezone or "default",
             "message": "文本解析成功"
         }
         
     except HTTPException:
         raise
-    except NotImplementedError as e:
-        logger.warning(f"Text parsing service undeveloped: {str(e)}")
+    except ValueError as e:
+        # 例如无效的时区名称
         raise HTTPException(
-            status_code=501,
-            detail="Text parsing "
+            status_code=400,
+            detail=str(e)
         )
     except Exception as e:
-        logger.error(f"Text parsing failed: {str(e)}", exc_info=True)
+        logger.error("Text parsing failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Text parsing failed: {str(e)}"
         )
     
 
-@router.get("/api/check_health")
-async def check_health():
+@router.get("/api/check_health", response_model=HealthCheckResponse)
+async def check_health(
+    refresh: bool = Query(False, description="Re-probe Tesseract instead of using the cached result")
+):
     """
+    Args:
+        refresh: re-probe Tesseract, default: false
+        
     Returns:
         {
             "status": str,     
@@ -174,12 +558,12 @@ async def check_health():
         
     Example:
         ```bash
-        curl "http://localhost:8000/api/check_health"
+        curl "http://localhost:8000/api/check_health?refresh=1"
         ```
     """
     try:
         ocr_service = get_ocr_service()
-        is_available = ocr_service.is_tesseract_available()
+        is_available = await asyncio.to_thread(ocr_service.is_tesseract_available, refresh)
         
         status = "healthy" if is_available else "unhealthy"
         message = "All service normal" if is_available else "Tesseract OCR is not installed"
@@ -191,7 +575,7 @@ async def check_health():
         }
         
     except Exception as e:
-        logger.error(f"Health check failed: {str(e)}", exc_info=True)
+        logger.error("Health check failed: %s", e, exc_info=True)
         raise HTTPException(
             status_code=503,
             detail=f"Health check failed: {str(e)}"
@@ -205,61 +589,61 @@ async def download_ics(request: ICSDownloadRequest):
         request
         
     Returns:
-        ICS file stream
+        ICS file stream (chunked, one VEVENT per chunk); the ETag identifies
+        the event list, the body is always sent since this is a POST
     
     """
     try:
         if not request.events or len(request.events) == 0:
             raise HTTPException(status_code=400, detail="事件列表不能为空")
         
-        # TODO: 实现 ICS 生成逻辑
-        from app.services.ics_service import ICSService
-        from app.models.event import Event
+        # 相同的事件列表得到相同的 ETag，重复下载直接返回缓存
+        key = hashlib.blake2b(
+            request.model_dump_json().encode("utf-8"), digest_size=16
+        ).hexdigest()
+        etag = f'"{key}"'
+        headers = {
+            "Content-Disposition": "attachment; filename=calendar.ics",
+            "Cache-Control": "no-cache",
+            "ETag": etag
+        }
         
-        ics_service = ICSService()
+        content = _ics_cache_get(key)
+        if content is not None:
+            logger.info("ICS 缓存命中: %d 个事件", len(request.events))
+            return Response(
+                content,
+                media_type="text/calendar; charset=utf-8",
+                headers=headers
+            )
         
-        # 将请求数据转换为 Event 对象
-        events = []
-        for event_data in request.events:
-            try:
-                start_time = datetime.fromisoformat(event_data.start_time)
-                end_time = datetime.fromisoformat(event_data.end_time)
-                
-                event = Event(
-                    title=event_data.title,
-                    start_time=start_time,
-                    end_time=end_time,
-                    location=event_data.location,
-                    description=event_data.description
-                )
-                events.append(event)
-            except ValueError as e:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"事件时间格式错误: {str(e)}"
-                )
-        
-        ics_content = ics_service.generate_ics(events)
-        
-        logger.info(f"ICS 文件生成成功: {len(events)} 个事件")
+        ics_service = get_ics_service()
+        
+        # 将请求数据转换为 Event 对象 (时间已由 Pydantic 解析为 datetime)
+        events = [
+            Event(
+                title=event_data.title,
+                start_time=event_data.start_time,
+                end_time=event_data.end_time,
+                location=event_data.location,
+                description=event_data.description
+            )
+            for event_data in request.events
+        ]
+        
+        logger.info("开始生成 ICS 文件: %d 个事件", len(events))
         
+        # 逐个 VEVENT 流式输出，不在内存中拼接整个日历
         return StreamingResponse(
-            iter([ics_content]),
+            _cache_ics_chunks(key, ics_service.generate_ics_iter(events)),
             media_type="text/calendar; charset=utf-8",
-            headers={
-                "Content-Disposition": "attachment; filename=calendar.ics"
-            }
+            headers=headers
         )
         
-    except NotImplementedError:
-        raise HTTPException(
-            status_code=501,
-            detail="ICS 生成功能正在开发中"
-        )
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"ICS 生成失败: {str(e)}", exc_info=True)
+        logger.error("ICS 生成失败: %s", e, exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"ICS 生成失败: {str(e)}"
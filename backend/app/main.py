@@ -1,19 +1,45 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
+import json
 import logging
+import os
+
+# 每个 tesseract 进程只用一个 OpenMP 线程，须在任何 OCR 调用之前设置
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+from fastapi import FastAPI, Response
+from fastapi.middleware.cors import CORSMiddleware
 
 from app.api import router
+from app.services.ocr_service import get_ocr_service
 
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 预热默认语言的 OCR 服务实例，并提前检测 Tesseract（结果会被缓存），
+    # 避免首个请求承担初始化和版本探测的开销
+    ocr_service = get_ocr_service()
+    if not ocr_service.is_tesseract_available():
+        logger.warning("Tesseract OCR is not available, OCR endpoints will return 503")
+    else:
+        # 首次识别会从磁盘加载语言模型，启动时先跑一次
+        await asyncio.to_thread(ocr_service.warm_up)
+    yield
+
 
 app = FastAPI(
     title="Easy ICS API",
     description="图片/文字生成 ICS 日历文件的 API 服务",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # 配置 CORS（允许前端跨域访问）
@@ -28,18 +54,24 @@ app.add_middleware(
 # 注册 API 路由
 app.include_router(router)
 
+# 静态响应体在启动时序列化一次，探活请求直接返回字节
+_ROOT_BODY = json.dumps({
+    "message": "Easy ICS API",
+    "version": "0.1.0",
+    "docs": "/docs",
+    "health": "/health"
+}).encode("utf-8")
+_HEALTH_BODY = b'{"status":"ok"}'
+
+
+# async def 直接在事件循环中执行，不经过线程池
 @app.get("/")
-def read_root():
-    return {
-        "message": "Easy ICS API",
-        "version": "0.1.0",
-        "docs": "/docs",
-        "health": "/health"
-    }
+async def read_root():
+    return Response(_ROOT_BODY, media_type="application/json")
 
 @app.get("/health")
-def health_check():
-    return {"status": "ok"}
+async def health_check():
+    return Response(_HEALTH_BODY, media_type="application/json")
 
 
 def main():
@@ -3,9 +3,10 @@
 包含业务模型和 Pydantic 数据验证模型
 """
 
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
 
 
@@ -18,26 +19,19 @@ class EventPriority(Enum):
     HIGH = "高"
 
 
+@dataclass(slots=True, frozen=True)
 class Event:
-    """日程事件业务模型"""
-    
-    def __init__(
-        self,
-        title: str,
-        start_time: datetime,
-        end_time: datetime,
-        location: Optional[str] = None,
-        description: Optional[str] = None,
-        priority: EventPriority = EventPriority.MEDIUM,
-        reminder_minutes: Optional[int] = None
-    ):
-        self.title = title
-        self.start_time = start_time
-        self.end_time = end_time
-        self.location = location
-        self.description = description
-        self.priority = priority
-        self.reminder_minutes = reminder_minutes
+    """
+    日程事件业务模型
+    使用 slots 去掉实例 __dict__，不可变以便在缓存中安全共享
+    """
+    title: str
+    start_time: datetime
+    end_time: datetime
+    location: Optional[str] = None
+    description: Optional[str] = None
+    priority: EventPriority = EventPriority.MEDIUM
+    reminder_minutes: Optional[int] = None
     
     def duration_hours(self) -> float:
         """计算事件持续时间(小时)"""
@@ -78,13 +72,13 @@ class EventData(BaseModel):
     用于验证和转换 API 输入/输出
     """
     title: str = Field(..., description="事件标题", min_length=1, max_length=100)
-    start_time: str = Field(..., description="开始时间 (ISO 格式: 2025-10-26T14:00:00)")
-    end_time: str = Field(..., description="结束时间 (ISO 格式: 2025-10-26T16:00:00)")
+    start_time: datetime = Field(..., description="开始时间 (ISO 格式: 2025-10-26T14:00:00)")
+    end_time: datetime = Field(..., description="结束时间 (ISO 格式: 2025-10-26T16:00:00)")
     location: Optional[str] = Field(None, description="地点", max_length=200)
     description: Optional[str] = Field(None, description="描述", max_length=500)
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "title": "项目讨论",
                 "start_time": "2025-10-26T14:00:00",
@@ -93,6 +87,25 @@ class EventData(BaseModel):
                 "description": "讨论项目进度"
             }
         }
+    )
+
+
+class TextParseRequest(BaseModel):
+    """
+    文本解析请求模型
+    文本放在 JSON 请求体中，不受 URL 长度限制
+    """
+    text: str = Field(..., description="待解析的文本内容", max_length=10000)
+    timezone: Optional[str] = Field(None, description="IANA 时区 (例如: Asia/Shanghai)")
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "text": "明天下午两点在会议室A开项目讨论会",
+                "timezone": "Asia/Shanghai"
+            }
+        }
+    )
 
 
 class ICSDownloadRequest(BaseModel):
@@ -100,10 +113,10 @@ class ICSDownloadRequest(BaseModel):
     ICS 下载请求模型
     包含多个事件的列表
     """
-    events: List[EventData] = Field(..., description="事件列表", min_items=1)
+    events: List[EventData] = Field(..., description="事件列表", min_length=1)
     
-    class Config:
-        json_schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "events": [
                     {
@@ -120,4 +133,5 @@ class ICSDownloadRequest(BaseModel):
                     }
                 ]
             }
-        }
\ No newline at end of file
+        }
+    )
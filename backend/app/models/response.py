@@ -0,0 +1,52 @@
+"""
+API 响应模型定义
+声明 response_model 后，FastAPI 直接由 pydantic-core 将响应序列化为 JSON 字节
+"""
+
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+
+
+class OCRResponse(BaseModel):
+    """单张图片 OCR 响应"""
+    success: bool
+    text: str
+    filename: Optional[str] = None
+    length: int
+    message: str
+
+
+class OCRFileResult(BaseModel):
+    """批量 OCR 中单个文件的结果"""
+    filename: Optional[str] = None
+    success: bool
+    text: str
+    length: int
+    message: str
+
+
+class BatchOCRResponse(BaseModel):
+    """批量 OCR 响应"""
+    success: bool
+    results: List[OCRFileResult]
+    combined_text: Optional[str] = Field(None, description="所有图片文本合并结果")
+    combined_length: int = Field(0, description="合并文本的长度（不返回合并文本时同样提供）")
+    total: int
+    successful_count: int
+    message: str
+
+
+class TextParseResponse(BaseModel):
+    """文本解析响应"""
+    success: bool
+    events: List[Dict[str, Any]]
+    count: int
+    timezone: str
+    message: str
+
+
+class HealthCheckResponse(BaseModel):
+    """健康检查响应"""
+    status: str
+    tesseract_available: bool
+    message: str
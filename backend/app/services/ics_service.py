@@ -1,2 +1,198 @@
-def generate_ics():
-    pass
\ No newline at end of file
+"""
+ICS 日历文件生成服务
+
+遵循 RFC 5545 (iCalendar):
+- 行以 CRLF 结尾，超过 75 字节的内容行折行
+- 无时区信息的时间按浮动时间 (floating time) 输出
+- 带时区信息的时间统一转换为 UTC
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List
+from functools import lru_cache
+import io
+import logging
+import os
+import re
+
+from app.models.event import Event, EventPriority
+
+logger = logging.getLogger(__name__)
+
+# TEXT 值转义表 (RFC 5545 3.3.11)，str.translate 一次遍历完成
+_ESCAPE_TABLE = str.maketrans({
+    "\\": "\\\\",
+    ";": "\\;",
+    ",": "\\,",
+    "\n": "\\n",
+    # \r\n 已先合并为 \n，单独的 \r (旧式 Mac 换行) 同样作为换行转义
+    "\r": "\\n",
+})
+# 需要转义的字符，大多数标题/地点不含这些字符，可直接原样返回
+_NEEDS_ESCAPE = re.compile(r"[\\;,\r\n]")
+
+
+class ICSService:
+    """ICS 日历生成服务"""
+
+    PRODID = "-//Easy ICS//Easy ICS 0.1.0//EN"
+    UID_DOMAIN = "easy-ics"
+
+    # 日历头尾不随导出变化，类定义时拼接并编码一次
+    VCALENDAR_HEADER = (
+        "BEGIN:VCALENDAR\r\n"
+        "VERSION:2.0\r\n"
+        f"PRODID:{PRODID}\r\n"
+        "CALSCALE:GREGORIAN\r\n"
+        "METHOD:PUBLISH\r\n"
+    ).encode("utf-8")
+    VCALENDAR_FOOTER = b"END:VCALENDAR\r\n"
+
+    # RFC 5545 PRIORITY: 1 最高, 5 普通, 9 最低
+    PRIORITY_VALUES = {
+        EventPriority.HIGH: 1,
+        EventPriority.MEDIUM: 5,
+        EventPriority.LOW: 9,
+    }
+
+    def generate_ics(self, events: List[Event]) -> str:
+        """
+        生成 ICS 日历内容
+
+        Args:
+            events: 事件列表
+
+        Returns:
+            ICS 文件内容
+        """
+        return b"".join(self.generate_ics_iter(events)).decode("utf-8")
+
+    def generate_ics_iter(self, events: List[Event]) -> Iterator[bytes]:
+        """
+        逐块生成 ICS 日历内容，可直接用于流式响应
+
+        依次产出日历头、每个 VEVENT、日历尾，内存占用与事件数量无关
+
+        Args:
+            events: 事件列表
+
+        Yields:
+            UTF-8 编码的 ICS 内容块
+        """
+        dtstamp = self._format_datetime(datetime.now(timezone.utc))
+        buf = io.StringIO()
+
+        yield self.VCALENDAR_HEADER
+        for event in events:
+            self._write_vevent(buf, event, dtstamp)
+            yield self._drain(buf)
+        yield self.VCALENDAR_FOOTER
+
+        logger.info("ICS 内容生成完成: %d 个事件", len(events))
+
+    def _write_vevent(self, buf: io.StringIO, event: Event, dtstamp: str) -> None:
+        """写入单个 VEVENT"""
+        self._write_line(buf, "BEGIN:VEVENT")
+        self._write_line(buf, f"UID:{self._generate_uid()}")
+        self._write_line(buf, f"DTSTAMP:{dtstamp}")
+
+        if event.is_all_day():
+            # 全天事件: DTEND 为结束日期的次日 (不包含)
+            end_date = event.end_time.date() + timedelta(days=1)
+            self._write_line(buf, f"DTSTART;VALUE=DATE:{event.start_time.strftime('%Y%m%d')}")
+            self._write_line(buf, f"DTEND;VALUE=DATE:{end_date.strftime('%Y%m%d')}")
+        else:
+            self._write_line(buf, f"DTSTART:{self._format_datetime(event.start_time)}")
+            self._write_line(buf, f"DTEND:{self._format_datetime(event.end_time)}")
+
+        self._write_line(buf, f"SUMMARY:{self._escape_text(event.title)}")
+        if event.location:
+            self._write_line(buf, f"LOCATION:{self._escape_text(event.location)}")
+        if event.description:
+            self._write_line(buf, f"DESCRIPTION:{self._escape_text(event.description)}")
+        self._write_line(buf, f"PRIORITY:{self._get_priority_value(event)}")
+
+        if event.reminder_minutes:
+            self._write_valarm(buf, event)
+
+        self._write_line(buf, "END:VEVENT")
+
+    def _write_valarm(self, buf: io.StringIO, event: Event) -> None:
+        """写入提醒 VALARM"""
+        self._write_line(buf, "BEGIN:VALARM")
+        self._write_line(buf, "ACTION:DISPLAY")
+        self._write_line(buf, f"DESCRIPTION:{self._escape_text(event.title)}")
+        self._write_line(buf, f"TRIGGER:-PT{event.reminder_minutes}M")
+        self._write_line(buf, "END:VALARM")
+
+    def _generate_uid(self) -> str:
+        """生成事件唯一标识 (128 位随机数，与 uuid4 同等唯一性，省去 UUID 对象构造)"""
+        return f"{os.urandom(16).hex()}@{self.UID_DOMAIN}"
+
+    def _get_priority_value(self, event: Event) -> int:
+        """获取 ICS PRIORITY 值"""
+        return self.PRIORITY_VALUES.get(event.priority, 5)
+
+    @staticmethod
+    def _format_datetime(dt: datetime) -> str:
+        """格式化时间: 带时区转换为 UTC，无时区保持浮动时间"""
+        # 定宽格式直接拼接字段，比 strftime 少一次格式串解析
+        if dt.tzinfo is None:
+            return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}T{dt.hour:02d}{dt.minute:02d}{dt.second:02d}"
+        if dt.tzinfo is not timezone.utc:
+            dt = dt.astimezone(timezone.utc)
+        return f"{dt.year:04d}{dt.month:02d}{dt.day:02d}T{dt.hour:02d}{dt.minute:02d}{dt.second:02d}Z"
+
+    @staticmethod
+    def _escape_text(text: str) -> str:
+        """转义 TEXT 类型的值，单次遍历完成全部替换"""
+        if not text:
+            return ""
+        if not _NEEDS_ESCAPE.search(text):
+            return text
+        if "\r" in text:
+            text = text.replace("\r\n", "\n")
+        return text.translate(_ESCAPE_TABLE)
+
+    @staticmethod
+    def _fold_line(line: str) -> str:
+        """按 RFC 5545 将超过 75 字节的内容行折行，不拆分多字节字符"""
+        # 纯 ASCII 或足够短 (每字符最多 4 字节) 的行无需编码即可判定不超长
+        if len(line) <= 18 or (line.isascii() and len(line) <= 75):
+            return line
+        if len(line.encode("utf-8")) <= 75:
+            return line
+
+        # 续行以一个空格开头，空格计入 75 字节
+        chunks = []
+        start = 0
+        size = 0
+        for i, char in enumerate(line):
+            code = ord(char)
+            width = 1 if code < 0x80 else 2 if code < 0x800 else 3 if code < 0x10000 else 4
+            if size + width > 75:
+                chunks.append(line[start:i])
+                start = i
+                size = 1
+            size += width
+        chunks.append(line[start:])
+        return "\r\n ".join(chunks)
+
+    def _write_line(self, buf: io.StringIO, line: str) -> None:
+        """写入一行内容，按需折行并以 CRLF 结尾"""
+        buf.write(self._fold_line(line))
+        buf.write("\r\n")
+
+    @staticmethod
+    def _drain(buf: io.StringIO) -> bytes:
+        """取出缓冲区内容并编码为 UTF-8，随后清空缓冲区供下一块复用"""
+        data = buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+        return data
+
+
+# 全局 ICS 服务实例 (单例模式)，服务无可变状态，可跨线程共享
+@lru_cache(maxsize=1)
+def get_ics_service() -> ICSService:
+    return ICSService()
@@ -7,19 +7,51 @@ Dependencies:
 Language Support: 
 - chi_sim+eng
 
+Optional:
+- tesserocr (pip install tesserocr): in-process OCR through a small pool of
+  sessions per language; each session holds its own copy of the loaded
+  language model, so memory grows with OCR_TESS_SESSIONS x languages in use
+
 
 Environment Variables:
 - TESSERACT_CMD: Custom path to tesseract executable (optional)
+- OMP_THREAD_LIMIT / OMP_NUM_THREADS: OpenMP threads per tesseract run (default: 1)
+- OCR_CACHE_SIZE: OCR results cached per language, keyed by image hash (default: 256)
+- OCR_BINARIZE: set to 1 to Otsu-binarize preprocessed images (default: off)
+- OCR_TESS_SESSIONS: tesserocr sessions kept per language (default: 2)
+- TESSDATA_PREFIX: traineddata directory; point it at tessdata_fast
+  (https://github.com/tesseract-ocr/tessdata_fast) for faster LSTM models
 """
 
 import pytesseract
-from PIL import Image
+from PIL import Image, ImageOps
 from pathlib import Path
-from typing import Optional, Dict, List, Any
+from io import BytesIO
+from typing import Optional, Dict, List, Any, BinaryIO, Iterator
+from collections import OrderedDict
+from contextlib import contextmanager
+import hashlib
 import logging
 import platform
+from functools import lru_cache
 import os
 import shutil
+import tempfile
+import threading
+import time
+
+# Tesseract processes run in parallel (one per request/file), multithreaded
+# OpenMP inside each of them oversubscribes the CPU and slows everything down.
+# Spawned tesseract processes inherit this from the server environment, and
+# libtesseract loaded in-process reads it when imported, so set it first.
+os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
+try:
+    # Optional: drives libtesseract in-process for batch OCR
+    import tesserocr
+except ImportError:
+    tesserocr = None
 
 logger = logging.getLogger(__name__)
 
@@ -87,16 +119,159 @@ else:
 OCR recog service class
 """
 class OCRService:
-    def __init__(self, lang: str = 'chi_sim+eng'):
+    # Longest side kept after downscaling, roughly a 300 DPI page
+    MAX_IMAGE_SIDE = 2400
+    
+    # Seconds a Tesseract availability probe result stays valid
+    AVAILABILITY_TTL = 30.0
+    
+    def __init__(
+        self,
+        lang: str = 'chi_sim+eng',
+        psm: int = 6,
+        oem: int = 1,
+        preprocess: bool = True,
+        binarize: bool = False
+    ):
         """
         initialize OCR service
         
         Args:
             lang: recog language, default chinese+english
+            psm: page segmentation mode, default 6 (single uniform block of
+                 text, skips layout analysis for screenshot-like inputs)
+            oem: OCR engine mode, default 1 (LSTM only)
+            preprocess: convert uploads to grayscale and downscale them
+                 before OCR, default True
+            binarize: additionally threshold preprocessed images to 1-bit
+                 black and white (Otsu), default False or OCR_BINARIZE=1
         """
         self.lang = lang
+        self.psm = psm
+        self.oem = oem
+        self.preprocess = preprocess
+        self.binarize = binarize or os.getenv('OCR_BINARIZE') == '1'
+        self._available: Optional[bool] = None
+        self._available_at = 0.0
+        self._languages: Optional[List[str]] = None
+        self._languages_at = 0.0
+        
+        # LRU cache of OCR results keyed by image content hash, so re-uploads
+        # of the same screenshot skip tesseract entirely
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+        self._cache_size = int(os.getenv('OCR_CACHE_SIZE', '256'))
+        self._cache_lock = threading.Lock()
+        
+        # tesserocr sessions are not thread-safe and each one holds a loaded
+        # model, so worker threads borrow from a small pool instead of each
+        # keeping its own; idle + borrowed sessions never exceed the slots
+        self._sessions: List["tesserocr.PyTessBaseAPI"] = []
+        self._sessions_lock = threading.Lock()
+        self._session_slots = threading.Semaphore(int(os.getenv('OCR_TESS_SESSIONS', '2')))
         logger.info(f"OCR service initialized, language: {lang}")
     
+    def build_config(self, psm: Optional[int] = None, oem: Optional[int] = None) -> str:
+        """
+        Build Tesseract configuration arguments, falling back to the
+        service defaults for modes that are not given
+        """
+        psm = self.psm if psm is None else psm
+        oem = self.oem if oem is None else oem
+        return f"--oem {oem} --psm {psm}"
+    
+    @classmethod
+    def _preprocess(cls, image: Image.Image, binarize: bool = False) -> Image.Image:
+        """
+        Reduce an image to what tesseract reads: 8-bit grayscale, at most
+        MAX_IMAGE_SIDE pixels on the longest side, contrast stretched
+        
+        For JPEG, draft() makes the decoder emit grayscale at a reduced DCT
+        scale directly, so the full-size RGB buffer is never allocated.
+        
+        The result is tagged as BMP: pytesseract writes its temp input file
+        in image.format, and an uncompressed BMP is an order of magnitude
+        quicker to write than the PNG it would otherwise encode.
+        """
+        scale = min(1, cls.MAX_IMAGE_SIDE / max(image.size))
+        # A zero-size request makes draft() divide by zero on very thin images
+        image.draft('L', (max(1, int(image.width * scale)), max(1, int(image.height * scale))))
+        if image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info:
+            # convert('L') drops alpha, and transparent pixels are usually
+            # stored as black: flatten onto white like a viewer would
+            image = image.convert('LA')
+            background = Image.new('L', image.size, 255)
+            background.paste(image.getchannel('L'), mask=image.getchannel('A'))
+            image = background
+        image = image.convert('L')
+        if max(image.size) > cls.MAX_IMAGE_SIDE:
+            image = ImageOps.contain(image, (cls.MAX_IMAGE_SIDE, cls.MAX_IMAGE_SIDE))
+        image = ImageOps.autocontrast(image)
+        if binarize:
+            # 1-bit output: tesseract skips its own thresholding and the
+            # temp file is an eighth of the grayscale size
+            threshold = cls._otsu_threshold(image.histogram())
+            image = image.point([0] * (threshold + 1) + [255] * (255 - threshold), '1')
+        image.format = 'BMP'
+        return image
+    
+    @staticmethod
+    def _otsu_threshold(histogram: List[int]) -> int:
+        """
+        Otsu's threshold for a 256-bin grayscale histogram: the level that
+        maximizes the variance between the dark and light classes
+        
+        Works on the histogram Pillow computes in C, so the Python loop is
+        256 steps regardless of image size.
+        """
+        total = sum(histogram)
+        total_sum = sum(level * count for level, count in enumerate(histogram))
+        weight_bg = 0
+        sum_bg = 0
+        best_level = 0
+        best_variance = -1.0
+        for level, count in enumerate(histogram):
+            weight_bg += count
+            if weight_bg == 0:
+                continue
+            weight_fg = total - weight_bg
+            if weight_fg == 0:
+                break
+            sum_bg += level * count
+            mean_diff = sum_bg / weight_bg - (total_sum - sum_bg) / weight_fg
+            variance = weight_bg * weight_fg * mean_diff * mean_diff
+            if variance > best_variance:
+                best_variance = variance
+                best_level = level
+        return best_level
+    
+    @staticmethod
+    def _cache_key(image_file: BinaryIO, config: str) -> str:
+        """
+        Hash the image content (BLAKE2b, 128-bit) together with the config
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        image_file.seek(0)
+        for chunk in iter(lambda: image_file.read(1 << 20), b''):
+            digest.update(chunk)
+        image_file.seek(0)
+        return f"{digest.hexdigest()}:{config}"
+    
+    def _cache_get(self, key: str) -> Optional[str]:
+        with self._cache_lock:
+            text = self._cache.get(key)
+            if text is not None:
+                self._cache.move_to_end(key)
+            return text
+    
+    def _cache_put(self, key: str, text: str) -> None:
+        if self._cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+    
     def extract_text_from_bytes(
         self, 
         image_bytes: bytes,
@@ -112,23 +287,174 @@ class OCRService:
         Returns:
             Text Content
         """
-        try:
-            from io import BytesIO
+        return self.extract_text_from_file(BytesIO(image_bytes), config)
 
-            image = Image.open(BytesIO(image_bytes))
+    def extract_text_from_file(
+        self, 
+        image_file: BinaryIO,
+        config: Optional[str] = None
+    ) -> str:
+        """
+        Extract text from a binary file object (e.g. UploadFile.file)
+        
+        The image is decoded straight from the file object, so spooled
+        uploads never need to be copied into a bytes buffer first.
+        
+        Args:
+            image_file: readable, seekable binary file object
+            config: Tesseract configuration arguments (optional)
             
-            text = pytesseract.image_to_string(
-                image,
-                lang=self.lang,
-                config=config or ''
-            )
+        Returns:
+            Text Content
+        """
+        if config is None:
+            config = self.build_config()
+        
+        try:
+            cache_key = self._cache_key(image_file, config)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                logger.info("OCR cache hit")
+                return cached
             
+            if self._use_api(config):
+                with self._tess_session() as api:
+                    text = self._recognize_with_api(image_file, api)
+            else:
+                image = Image.open(image_file)
+                if self.preprocess:
+                    image = self._preprocess(image, self.binarize)
+                
+                text = pytesseract.image_to_string(
+                    image,
+                    lang=self.lang,
+                    config=config
+                ).strip()
+            
+            self._cache_put(cache_key, text)
             logger.info("Successfully identified image")
-            return text.strip()
+            return text
             
         except Exception as e:
-            logger.error(f"OCR recognize failure: {str(e)}")
-            raise Exception(f"OCR recognize failure: {str(e)}")
+            logger.error("OCR recognize failure: %s", e)
+            raise Exception(f"OCR recognize failure: {str(e)}") from e
+    
+    def extract_text_from_files(
+        self,
+        image_files: List[BinaryIO],
+        config: Optional[str] = None
+    ) -> List[str]:
+        """
+        Extract text from several binary file objects with one tesseract run
+        
+        Cached images are answered from the cache; the rest are recognized
+        together, in-process through tesserocr when it is installed and the
+        default config is used, otherwise via a tesseract list file.
+        
+        Args:
+            image_files: readable, seekable binary file objects
+            config: Tesseract configuration arguments (optional)
+            
+        Returns:
+            Text content of each image, in input order
+        """
+        if config is None:
+            config = self.build_config()
+        
+        cache_keys = [self._cache_key(f, config) for f in image_files]
+        texts: List[Optional[str]] = [self._cache_get(key) for key in cache_keys]
+        misses = [i for i, text in enumerate(texts) if text is None]
+        
+        if misses:
+            missed_files = [image_files[i] for i in misses]
+            if self._use_api(config):
+                recognized = self._extract_with_api(missed_files)
+            else:
+                recognized = self._extract_with_list_file(missed_files, config)
+            
+            for i, text in zip(misses, recognized):
+                texts[i] = text
+                self._cache_put(cache_keys[i], text)
+        
+        return texts
+
+    def _load_image(self, image_file: BinaryIO) -> Image.Image:
+        """Decode (and preprocess) an image, leaving the file rewound"""
+        image = Image.open(image_file)
+        if self.preprocess:
+            image = self._preprocess(image, self.binarize)
+        else:
+            image.load()
+        image_file.seek(0)
+        return image
+    
+    @contextmanager
+    def _tess_session(self) -> Iterator["tesserocr.PyTessBaseAPI"]:
+        """
+        Borrow a tesserocr session from this service's pool, waiting while
+        all of them are in use
+        
+        Sessions are created on first use and kept, so language data is
+        loaded at most OCR_TESS_SESSIONS times per language.
+        """
+        with self._session_slots:
+            with self._sessions_lock:
+                api = self._sessions.pop() if self._sessions else None
+            if api is None:
+                api = tesserocr.PyTessBaseAPI(lang=self.lang, psm=self.psm, oem=self.oem)
+            try:
+                yield api
+            finally:
+                with self._sessions_lock:
+                    self._sessions.append(api)
+    
+    def _use_api(self, config: str) -> bool:
+        """tesserocr sessions are built with the default config only"""
+        return tesserocr is not None and config == self.build_config()
+    
+    def _recognize_with_api(self, image_file: BinaryIO, api: "tesserocr.PyTessBaseAPI") -> str:
+        """
+        Recognize one image with a borrowed in-process tesseract session
+        
+        The image is handed over as decoded pixels, so no subprocess or
+        temp files are involved.
+        """
+        api.SetImage(self._load_image(image_file))
+        return api.GetUTF8Text().strip()
+    
+    def _extract_with_api(self, image_files: List[BinaryIO]) -> List[str]:
+        """Recognize images one after another in one borrowed tesserocr session"""
+        try:
+            with self._tess_session() as api:
+                texts = [self._recognize_with_api(f, api) for f in image_files]
+            
+            logger.info("Successfully identified %d images", len(texts))
+            return texts
+            
+        except Exception as e:
+            logger.error("Batch OCR recognize failed: %s", e)
+            raise Exception(f"Batch OCR recognize failed: {str(e)}") from e
+    
+    def _extract_with_list_file(
+        self,
+        image_files: List[BinaryIO],
+        config: str
+    ) -> List[str]:
+        """Copy images to a temp directory and recognize them in one tesseract run"""
+        with tempfile.TemporaryDirectory(prefix='ocr_batch_') as tmp_dir:
+            image_paths = []
+            for i, image_file in enumerate(image_files):
+                image_path = os.path.join(tmp_dir, f"{i}.img")
+                if self.preprocess:
+                    # Uncompressed BMP: lossless and the quickest format to write
+                    self._load_image(image_file).save(image_path, format='BMP')
+                else:
+                    with open(image_path, 'wb') as f:
+                        shutil.copyfileobj(image_file, f)
+                    image_file.seek(0)
+                image_paths.append(image_path)
+            
+            return self.extract_text_from_list(image_paths, config)
 
     def extract_text_from_image(
         self, 
@@ -155,21 +481,74 @@ class OCRService:
             
             image = Image.open(image_path)
             
+            if config is None:
+                config = self.build_config()
 
             text = pytesseract.image_to_string(
                 image, 
                 lang=self.lang,
-                config=config or ''
+                config=config
             )
             
-            logger.info(f"Image successfully recognized: {image_path}")
+            logger.info("Image successfully recognized: %s", image_path)
             return text.strip()
             
         except FileNotFoundError:
             raise
         except Exception as e:
-            logger.error(f"OCR recognize failed: {str(e)}")
-            raise Exception(f"OCR recognize failed: {str(e)}")
+            logger.error("OCR recognize failed: %s", e)
+            raise Exception(f"OCR recognize failed: {str(e)}") from e
+    
+    def extract_text_from_list(
+        self,
+        image_paths: List[str],
+        config: Optional[str] = None
+    ) -> List[str]:
+        """
+        Extract text from several local images with a single tesseract run
+        
+        The paths are written to a list file, so tesseract starts and loads
+        its language data once for the whole batch instead of once per image.
+        
+        Args:
+            image_paths: local image file paths
+            config: Tesseract configuration arguments (optional)
+            
+        Returns:
+            Text content of each image, in input order
+            
+        Raises:
+            Exception: OCR Failure, or page count not matching the inputs
+        """
+        if config is None:
+            config = self.build_config()
+        
+        try:
+            with tempfile.TemporaryDirectory(prefix='ocr_list_') as tmp_dir:
+                list_path = Path(tmp_dir) / 'images.txt'
+                list_path.write_text('\n'.join(image_paths) + '\n', encoding='utf-8')
+                
+                output = pytesseract.image_to_string(
+                    str(list_path),
+                    lang=self.lang,
+                    config=config
+                )
+            
+            # tesseract terminates every page with a form feed
+            if output.endswith('\x0c'):
+                output = output[:-1]
+            pages = output.split('\x0c')
+            if len(pages) != len(image_paths):
+                raise ValueError(
+                    f"expected {len(image_paths)} pages, got {len(pages)}"
+                )
+            
+            logger.info("Successfully identified %d images", len(image_paths))
+            return [page.strip() for page in pages]
+            
+        except Exception as e:
+            logger.error("Batch OCR recognize failed: %s", e)
+            raise Exception(f"Batch OCR recognize failed: {str(e)}") from e
     
     def get_image_info(self, image_path: str) -> Dict[str, Any]:
         """
@@ -205,40 +584,83 @@ class OCRService:
             logger.error(f"获取图片信息失败: {str(e)}")
             raise Exception(f"获取图片信息失败: {str(e)}")
     
-    def is_tesseract_available(self) -> bool:
+    def is_tesseract_available(self, refresh: bool = False) -> bool:
         """
         Check Tesseract avaliability
+        
+        Probing spawns a tesseract process, so the result is cached on the
+        instance for AVAILABILITY_TTL seconds; frequent health checks reuse
+        it while installs or removals are still picked up.
+        
+        Args:
+            refresh: probe again instead of returning the cached result
         """
+        fresh = time.monotonic() - self._available_at < self.AVAILABILITY_TTL
+        if self._available is not None and fresh and not refresh:
+            return self._available
+        
         try:
             version = pytesseract.get_tesseract_version()
             logger.info(f"Tesseract version: {version}")
-            return True
+            self._available = True
         except Exception as e:
             logger.error(f"Tesseract is unavaliable: {str(e)}")
-            return False
+            self._available = False
+        self._available_at = time.monotonic()
+        return self._available
     
-    def get_available_languages(self) -> List[str]:
+    def warm_up(self) -> None:
+        """
+        Run one OCR on a small blank image so the OS page cache holds the
+        language data before the first real request
+        
+        Bypasses the result cache; failures are only logged.
+        """
+        try:
+            pytesseract.image_to_string(
+                Image.new('L', (32, 32), 255),
+                lang=self.lang,
+                config=self.build_config()
+            )
+            logger.info("OCR warm-up done, language: %s", self.lang)
+        except Exception as e:
+            logger.warning("OCR warm-up failed: %s", e)
+    
+    def get_available_languages(self, refresh: bool = False) -> List[str]:
         """
         get the language list that Tesseract supports
+        
+        Like the availability probe, a successful listing is cached for
+        AVAILABILITY_TTL seconds; failures are not cached.
+        
+        Args:
+            refresh: list again instead of returning the cached result
         """
+        fresh = time.monotonic() - self._languages_at < self.AVAILABILITY_TTL
+        if self._languages is not None and fresh and not refresh:
+            return list(self._languages)
+        
         try:
             langs = pytesseract.get_languages()
             logger.info(f"Supported languages: {langs}")
+            self._languages = list(langs)
+            self._languages_at = time.monotonic()
             return langs
         except Exception as e:
             logger.error(f"Unable to obtain supported language list: {str(e)}")
             return []
 
 
-# Create global OCR service instance (SIngleton Pattern)
-_ocr_service: Optional[OCRService] = None
+# Cached OCR service instances, one per language (Singleton Pattern)
+@lru_cache(maxsize=8)
+def _get_ocr_service(lang: str) -> OCRService:
+    return OCRService(lang=lang)
 
 
-def get_ocr_service() -> OCRService:
-    global _ocr_service
-    if _ocr_service is None:
-        _ocr_service = OCRService()
-    return _ocr_service
+def get_ocr_service(lang: Optional[str] = 'chi_sim+eng') -> OCRService:
+    # lru_cache keys get_ocr_service() and get_ocr_service('chi_sim+eng')
+    # differently, so the language is normalized before the cached lookup
+    return _get_ocr_service(lang or 'chi_sim+eng')
 
 def extract_text_from_image(image_path: str) -> str:
     service = get_ocr_service()
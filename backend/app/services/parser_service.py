@@ -0,0 +1,452 @@
+"""
+文本解析服务
+从文本（OCR 结果或用户输入）中提取日程事件
+
+基于规则的解析:
+- 日期: 2024年10月28日 / 2024-10-28 / 10月28日 / 10/28 / 今天 / 明天 / 后天
+- 时间: 14:00-16:00 / 下午两点 / 下午2点半 / 上午10点到11点
+- 时长: 2小时 / 30分钟 (没有结束时间时使用，默认 1 小时)
+- 地点: 地点：会议室 A / 在会议室A开会 / 会议室A
+- 标题: 去掉以上内容后剩下的文字
+
+所有正则在模块加载时编译一次
+
+Optional:
+- dateparser (pip install dateparser): 正则无法识别的相对日期 (下周三 等)
+  交给 dateparser，首次需要时才导入
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Tuple
+from collections import OrderedDict
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+import logging
+import re
+import threading
+
+from app.models.event import Event
+
+logger = logging.getLogger(__name__)
+
+
+# ===== 预编译正则 =====
+# 可变长度的部分都有上限或不与相邻部分重叠，长输入上匹配时间保持线性
+
+# 日期，按优先级排列
+DATE_PATTERNS = (
+    re.compile(r"(?P<year>\d{4})\s*[年\-/.]\s*(?P<month>\d{1,2})\s*[月\-/.]\s*(?P<day>\d{1,2})\s*[日号]?"),
+    re.compile(r"(?P<month>\d{1,2})\s*月\s*(?P<day>\d{1,2})\s*[日号]?"),
+    re.compile(r"(?P<month>\d{1,2})/(?P<day>\d{1,2})"),
+    re.compile(r"(?P<relative>大后天|后天|明天|今天)"),
+)
+RELATIVE_DAYS = {"今天": 0, "明天": 1, "后天": 2, "大后天": 3}
+
+# 正则不处理、需要 dateparser 的相对日期写法
+_NEEDS_DATEPARSER_RE = re.compile(r"(?:下|上|本|这)?(?:周|星期|礼拜)[一二三四五六日天]|下周|下星期|下个月")
+
+# dateparser 导入时加载全部语言数据 (较慢)，首次需要时才导入; False 表示未安装
+_dateparser_search = None
+
+# 时间: 14:00 / 两点 / 2点半 / 2点30分，可带上午/下午等时段
+_HOUR = r"\d{1,2}|[零一二两三四五六七八九十]{1,3}"
+
+
+def _time_pattern(prefix: str) -> str:
+    return (
+        # 时段后的空白放进可选组内，否则长空白串上每个位置都会回溯 (平方复杂度)
+        rf"(?:(?P<{prefix}period>凌晨|早上|上午|中午|下午|傍晚|晚上)\s*)?"
+        rf"(?P<{prefix}hour>{_HOUR})\s*"
+        rf"(?:[:：]\s*(?P<{prefix}minute>\d{{2}})"
+        rf"|点(?:(?P<{prefix}half>半)|(?P<{prefix}pminute>\d{{1,2}})分?)?)"
+    )
+
+
+_TIME_RANGE_RE = re.compile(_time_pattern("s") + r"\s*(?:-|~|～|—|–|至|到)\s*" + _time_pattern("e"))
+_TIME_RE = re.compile(_time_pattern("s"))
+PM_PERIODS = frozenset(("中午", "下午", "傍晚", "晚上"))
+CN_DIGITS = {
+    "零": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4,
+    "五": 5, "六": 6, "七": 7, "八": 8, "九": 9,
+}
+
+# 时长
+# 数字限长: 不限长时长数字串上每个位置都会扫描到串尾 (平方复杂度)
+_HOURS_RE = re.compile(r"(?P<hours>\d{1,4}(?:\.\d{1,2})?)\s*个?\s*小时")
+_MINUTES_RE = re.compile(r"(?P<minutes>\d{1,4})\s*分钟")
+
+# 地点，按优先级排列; keep 组为标题中需要保留的文字 ("在会议室开会" 留下 "开会")
+LOCATION_PATTERNS = (
+    re.compile(r"(?:地点|地址|位置)\s*[:：]\s*(?P<location>[^\n，,。；;]+)"),
+    # 地点不跨过下一个 "在" 且限长 30，否则每个 "在" 都会扫描到行尾 (平方复杂度)
+    re.compile(r"在\s*(?P<location>[^\s，,。！？、在]{1,30}?)\s*(?:(?P<keep>开会|开)|举行|召开|参加|见面)"),
+    re.compile(r"(?P<location>(?:会议室|教室|办公室|报告厅|礼堂)[A-Za-z0-9]*)"),
+)
+
+# 提取标题时去掉的日期时间内容
+DATETIME_PATTERNS = DATE_PATTERNS + (
+    _NEEDS_DATEPARSER_RE, _TIME_RANGE_RE, _TIME_RE, _HOURS_RE, _MINUTES_RE
+)
+
+_GROUP_NAME_RE = re.compile(r"\(\?P<(\w+)>")
+
+
+def _unnamed(pattern: str) -> str:
+    """去掉命名组的名字 (keep 除外)，多个模式才能合并进同一个正则"""
+    return _GROUP_NAME_RE.sub(lambda m: m.group(0) if m.group(1) == "keep" else "(?:", pattern)
+
+
+# 标题中需要去掉的全部内容合并为一个交替式，一次扫描完成替换;
+# 分支顺序即优先级，与逐个模式替换的顺序一致
+_TITLE_STRIP_RE = re.compile("|".join(
+    f"(?:{_unnamed(p.pattern)})" for p in DATETIME_PATTERNS + LOCATION_PATTERNS
+))
+
+_SEGMENT_SPLIT_RE = re.compile(r"[。！？!?；;\n]")
+_WS_RE = re.compile(r"\s+")
+# _WS_RE 已把空白压成单个空格，首尾去除用 str.strip 即可 (正则的 $ 分支在长标点串上是平方复杂度)
+_TRIM_CHARS = "，,。！？、:：- "
+
+DEFAULT_DURATION = timedelta(hours=1)
+DEFAULT_TITLE = "未命名事件"
+MAX_TITLE_LENGTH = 100
+
+
+class ParserService:
+    """文本解析服务"""
+
+    def parse_text_to_events(
+        self,
+        text: str,
+        timezone: Optional[str] = None,
+        today: Optional[date] = None
+    ) -> List[Event]:
+        """
+        从文本中解析事件
+
+        Args:
+            text: 待解析的文本
+            timezone: IANA 时区名称 (可选)，默认使用本地时间
+            today: 相对日期的基准日期 (可选)，默认为该时区的今天
+
+        Returns:
+            解析出的事件列表
+
+        Raises:
+            ValueError: 时区名称无效
+        """
+        tzinfo = resolve_timezone(timezone)
+        if today is None:
+            today = datetime.now(tzinfo).date()
+        return self.parse_multiple_events(text, today, tzinfo)
+
+    def parse_multiple_events(
+        self,
+        text: str,
+        today: date,
+        tzinfo: Optional[ZoneInfo] = None
+    ) -> List[Event]:
+        """
+        按句子/行切分文本并分组，每组得到一个事件
+
+        出现新的日期且当前组已有日期时开始新的一组，其余句子
+        (标题、地点等) 归入当前组; 既无日期也无时间的组被丢弃
+        """
+        # 每组记录其中第一个日期，构建事件时不再重新扫描
+        groups: List[List[str]] = []
+        days: List[Optional[date]] = []
+        for segment in _SEGMENT_SPLIT_RE.split(text):
+            segment = segment.strip()
+            if not segment:
+                continue
+            day = self.parse_date_with_dateparser(segment, today)
+            if not groups or (day is not None and days[-1] is not None):
+                groups.append([])
+                days.append(None)
+            groups[-1].append(segment)
+            if days[-1] is None:
+                days[-1] = day
+
+        events = []
+        for segments, day in zip(groups, days):
+            event = self._build_event(segments, day, today, tzinfo)
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _build_event(
+        self,
+        segments: List[str],
+        day: Optional[date],
+        today: date,
+        tzinfo: Optional[ZoneInfo]
+    ) -> Optional[Event]:
+        """由一组句子及其日期构建事件"""
+        text = "\n".join(segments)
+        times = self._extract_time_offsets(text)
+        if day is None and times is None:
+            return None
+        if day is None:
+            day = today
+
+        if times is None:
+            # 没有时间视为全天事件
+            start_time = datetime.combine(day, time(0, 0), tzinfo)
+            end_time = datetime.combine(day, time(23, 59), tzinfo)
+        else:
+            start, end = times
+            midnight = datetime.combine(day, time(0, 0), tzinfo)
+            try:
+                start_time = midnight + start
+                if end is not None:
+                    end_time = midnight + end
+                    if end_time <= start_time:
+                        end_time += timedelta(days=1)
+                else:
+                    end_time = start_time + (self.extract_duration(text) or DEFAULT_DURATION)
+            except OverflowError:
+                # 如 9999年12月31日 晚上11点到1点，结束时间超出 datetime 范围，跳过该事件
+                logger.warning("事件时间超出范围，已跳过: %s", day)
+                return None
+
+        return Event(
+            title=self.extract_title(segments),
+            start_time=start_time,
+            end_time=end_time,
+            location=self.extract_location(text),
+        )
+
+    def parse_simple_date(self, text: str, today: date) -> Optional[date]:
+        """
+        提取文本中的第一个日期
+
+        Args:
+            text: 待解析的文本
+            today: 相对日期和缺省年份的基准日期
+
+        Returns:
+            日期，未找到或日期无效时返回 None
+        """
+        for pattern in DATE_PATTERNS:
+            match = pattern.search(text)
+            if match is None:
+                continue
+            groups = match.groupdict()
+            if groups.get("relative"):
+                return today + timedelta(days=RELATIVE_DAYS[groups["relative"]])
+            try:
+                return date(
+                    int(groups["year"]) if groups.get("year") else today.year,
+                    int(groups["month"]),
+                    int(groups["day"]),
+                )
+            except ValueError:
+                return None
+        return None
+
+    def parse_date_with_dateparser(self, text: str, today: date) -> Optional[date]:
+        """
+        提取日期，正则优先; 只有出现正则不处理的相对日期 (下周三 等) 时
+        才调用 dateparser，未安装 dateparser 时返回 None
+        """
+        day = self.parse_simple_date(text, today)
+        if day is not None or not _NEEDS_DATEPARSER_RE.search(text):
+            return day
+
+        search_dates = _load_dateparser()
+        if search_dates is None:
+            return None
+        try:
+            found = search_dates(
+                text,
+                languages=["zh", "en"],
+                settings={
+                    "RELATIVE_BASE": datetime.combine(today, time(0, 0)),
+                    "PREFER_DATES_FROM": "future",
+                },
+            )
+        except Exception as e:
+            logger.warning("dateparser failed: %s", e)
+            return None
+        return found[0][1].date() if found else None
+
+    def extract_time_range(self, text: str) -> Optional[Tuple[time, Optional[time]]]:
+        """
+        提取开始时间和结束时间 (可能没有)
+
+        结束时间未写时段时沿用开始时间的时段，如 "下午2点到4点"
+        """
+        offsets = self._extract_time_offsets(text)
+        if offsets is None:
+            return None
+        start, end = offsets
+        return _clock(start), (_clock(end) if end is not None else None)
+
+    def _extract_time_offsets(self, text: str) -> Optional[Tuple[timedelta, Optional[timedelta]]]:
+        """同 extract_time_range，但以距当天零点的时长表示，晚上12点为 24 小时 (次日零点)"""
+        match = _TIME_RANGE_RE.search(text)
+        if match is not None:
+            start_period = match.group("speriod")
+            start = self._to_offset(match, "s", start_period)
+            end = self._to_offset(match, "e", match.group("eperiod") or start_period)
+            if start is not None and end is not None:
+                return start, end
+
+        match = _TIME_RE.search(text)
+        if match is not None:
+            start = self._to_offset(match, "s", match.group("speriod"))
+            if start is not None:
+                return start, None
+        return None
+
+    @staticmethod
+    def _to_offset(match, prefix: str, period: Optional[str]) -> Optional[timedelta]:
+        """将时间匹配结果转换为距当天零点的时长，小时或分钟越界时返回 None"""
+        hour = _parse_number(match.group(f"{prefix}hour"))
+        if match.group(f"{prefix}half"):
+            minute = 30
+        else:
+            minute = int(match.group(f"{prefix}minute") or match.group(f"{prefix}pminute") or 0)
+        if minute > 59:
+            return None
+        if period == "晚上" and hour in (0, 12):
+            # 晚上12点 (0点) 是当天结束时的午夜，即次日零点
+            return timedelta(days=1, minutes=minute)
+        if period == "凌晨" and hour == 12:
+            hour = 0
+        elif period in PM_PERIODS and hour < 12:
+            hour += 12
+        if hour > 23:
+            return None
+        return timedelta(hours=hour, minutes=minute)
+
+    def extract_duration(self, text: str) -> Optional[timedelta]:
+        """提取时长，如 2小时、1.5个小时、30分钟"""
+        match = _HOURS_RE.search(text)
+        if match is not None:
+            return timedelta(hours=float(match.group("hours")))
+        match = _MINUTES_RE.search(text)
+        if match is not None:
+            return timedelta(minutes=int(match.group("minutes")))
+        return None
+
+    def extract_location(self, text: str) -> Optional[str]:
+        """提取地点"""
+        for pattern in LOCATION_PATTERNS:
+            match = pattern.search(text)
+            if match is not None:
+                location = match.group("location").strip()
+                if location:
+                    return location
+        return None
+
+    def extract_title(self, segments: List[str]) -> str:
+        """
+        提取标题: 第一句去掉日期时间和地点后剩余的文字
+
+        整句都是日期时间或地点时顺延到下一句
+        """
+        for segment in segments:
+            title = _TITLE_STRIP_RE.sub(_keep_verb, segment)
+            title = _WS_RE.sub(" ", title).strip(_TRIM_CHARS)
+            if title:
+                return title[:MAX_TITLE_LENGTH]
+        return DEFAULT_TITLE
+
+
+def _load_dateparser():
+    """按需导入 dateparser.search.search_dates，未安装时返回 None"""
+    global _dateparser_search
+    if _dateparser_search is None:
+        try:
+            from dateparser.search import search_dates
+            _dateparser_search = search_dates
+        except ImportError:
+            logger.info("dateparser not installed, relative weekdays are not parsed")
+            _dateparser_search = False
+    return _dateparser_search or None
+
+
+def _keep_verb(match) -> str:
+    """地点匹配替换为其中的动词: 在会议室A开会 只留下 开会"""
+    return match.group("keep") or ""
+
+
+def _clock(offset: timedelta) -> time:
+    """距零点的时长转换为钟面时间，24 小时即 0 点"""
+    return time(*divmod(offset.seconds // 60, 60))
+
+
+def _parse_number(value: str) -> int:
+    """解析阿拉伯数字或不超过九十九的中文数字"""
+    if value.isdecimal():
+        return int(value)
+    if "十" in value:
+        tens, _, ones = value.partition("十")
+        return CN_DIGITS.get(tens, 1) * 10 + CN_DIGITS.get(ones, 0)
+    return CN_DIGITS.get(value, 0)
+
+
+def resolve_timezone(timezone: Optional[str]) -> Optional[ZoneInfo]:
+    """
+    解析 IANA 时区名称，未指定时返回 None (本地时间)
+
+    Raises:
+        ValueError: 时区名称无效
+    """
+    if not timezone:
+        return None
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ValueError(f"无效的时区: {timezone}") from e
+
+
+def today_in(timezone: Optional[str]) -> date:
+    """指定时区 (未指定时为本地) 的今天"""
+    return datetime.now(resolve_timezone(timezone)).date()
+
+
+# 全局解析服务实例 (单例模式)，服务无可变状态，可跨线程共享
+@lru_cache(maxsize=1)
+def get_parser_service() -> ParserService:
+    return ParserService()
+
+
+# 解析结果缓存: 解析在线程池中执行，命中与否必须在取值时一并得出，
+# 不能事后比较全局命中计数 (并发请求会同时改变计数)
+_PARSE_CACHE_SIZE = 512
+_parse_cache: "OrderedDict[Tuple[str, Optional[str], date], Tuple[Event, ...]]" = OrderedDict()
+_parse_cache_lock = threading.Lock()
+
+
+def parse_text_cached(
+    text: str,
+    timezone: Optional[str],
+    today: date
+) -> Tuple[Tuple[Event, ...], bool]:
+    """
+    带缓存的文本解析，相同的文本、时区和日期直接返回上次的结果
+
+    "明天" 等相对日期依赖当天日期，today 作为缓存键的一部分，
+    跨天后同样的文本会重新解析; 调用方用 today_in(timezone) 取得
+
+    缓存的事件对象会被多个请求共享，调用方不应修改
+
+    Returns:
+        (事件元组, 是否命中缓存)
+    """
+    key = (text, timezone, today)
+    with _parse_cache_lock:
+        events = _parse_cache.get(key)
+        if events is not None:
+            _parse_cache.move_to_end(key)
+            return events, True
+
+    # 解析不持锁，不同文本可以并行解析
+    events = tuple(get_parser_service().parse_text_to_events(text, timezone=timezone, today=today))
+    with _parse_cache_lock:
+        _parse_cache[key] = events
+        while len(_parse_cache) > _PARSE_CACHE_SIZE:
+            _parse_cache.popitem(last=False)
+    return events, False
@@ -119,6 +119,7 @@ def run_checks() -> dict:
         ("Pillow", "PIL"),
         ("Python-multipart", "multipart"),
         ("Uvicorn", "uvicorn"),
+        ("uvloop (可选，非 Windows)", "uvloop"),
     ]
     
     for name, import_name in packages:
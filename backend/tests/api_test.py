@@ -0,0 +1,251 @@
+"""
+API Endpoint Tests
+
+通过 TestClient 测试 HTTP 接口，OCR 部分以 mock 代替 tesseract，包括：
+- 单张 / 批量图片上传
+- 文本解析
+- ICS 下载
+"""
+
+import uuid
+
+import pytest
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+from app import api
+from app.main import app
+from app.services.ocr_service import OCRService
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _png(name: str) -> bytes:
+    """带 PNG 文件头的假图片，内容即识别结果 (OCR 已被 mock)"""
+    return PNG_SIGNATURE + name.encode("utf-8")
+
+
+def _fake_text(image_file) -> str:
+    image_file.seek(0)
+    text = image_file.read()[len(PNG_SIGNATURE):].decode("utf-8")
+    if text.startswith("bad"):
+        raise Exception("OCR recognize failure: bad image")
+    return text
+
+
+def _fake_extract_file(self, image_file, config=None):
+    return _fake_text(image_file)
+
+
+def _fake_extract_files(self, image_files, config=None):
+    return [_fake_text(f) for f in image_files]
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def ocr_available():
+    with patch.object(OCRService, "is_tesseract_available", return_value=True), \
+         patch.object(OCRService, "extract_text_from_file", _fake_extract_file), \
+         patch.object(OCRService, "extract_text_from_files", _fake_extract_files):
+        yield
+
+
+class TestUploadImage:
+    """单张图片上传测试"""
+
+    def test_upload_img_success(self, client, ocr_available):
+        """测试识别成功"""
+        response = client.post("/api/upload/img", files={"file": ("a.png", _png("hello"), "image/png")})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["text"] == "hello"
+        assert data["length"] == 5
+
+    def test_upload_img_unsupported_type(self, client, ocr_available):
+        """测试文件头不是图片时返回 415"""
+        response = client.post("/api/upload/img", files={"file": ("a.png", b"not an image", "image/png")})
+
+        assert response.status_code == 415
+
+    def test_upload_img_too_large(self, client, ocr_available, monkeypatch):
+        """测试超过单张图片上限时返回 413"""
+        monkeypatch.setattr(api, "_MAX_IMAGE_BYTES", 16)
+
+        response = client.post("/api/upload/img", files={"file": ("a.png", _png("x" * 32), "image/png")})
+
+        assert response.status_code == 413
+
+    def test_upload_img_at_limit(self, client, ocr_available, monkeypatch):
+        """测试正好等于上限的图片不因 multipart 开销被拒绝"""
+        content = _png("x" * 32)
+        monkeypatch.setattr(api, "_MAX_IMAGE_BYTES", len(content))
+
+        response = client.post("/api/upload/img", files={"file": ("a.png", content, "image/png")})
+
+        assert response.status_code == 200
+
+    def test_upload_img_tesseract_unavailable(self, client):
+        """测试 Tesseract 不可用时返回 503"""
+        with patch.object(OCRService, "is_tesseract_available", return_value=False):
+            response = client.post("/api/upload/img", files={"file": ("a.png", _png("a"), "image/png")})
+
+        assert response.status_code == 503
+
+
+class TestUploadImages:
+    """批量图片上传测试"""
+
+    def test_upload_imgs_keeps_order(self, client, ocr_available):
+        """测试结果与上传顺序一致，不可用的文件单独失败"""
+        files = [("files", (f"{i}.png", _png(f"text{i}"), "image/png")) for i in range(6)]
+        files.insert(2, ("files", ("note.txt", b"plain text", "text/plain")))
+
+        response = client.post("/api/upload/imgs", files=files)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["filename"] for r in data["results"]] == [
+            "0.png", "1.png", "note.txt", "2.png", "3.png", "4.png", "5.png"
+        ]
+        assert [r["text"] for r in data["results"]] == [
+            "text0", "text1", "", "text2", "text3", "text4", "text5"
+        ]
+        assert data["results"][2]["success"] is False
+        assert data["successful_count"] == 6
+        assert data["combined_text"] == "\n".join(f"text{i}" for i in range(6))
+
+    def test_upload_imgs_per_file_fallback(self, client, ocr_available, monkeypatch):
+        """测试批量识别失败时逐张重试，只有坏图片失败"""
+        files = [
+            ("files", ("a.png", _png("first"), "image/png")),
+            ("files", ("b.png", _png("bad"), "image/png")),
+            ("files", ("c.png", _png("third"), "image/png")),
+        ]
+
+        # 一组识别三张，批量失败后回退到逐张识别
+        monkeypatch.setattr(api, "_OCR_MAX_CONCURRENCY", 1)
+        response = client.post("/api/upload/imgs", files=files)
+
+        data = response.json()
+        assert [r["success"] for r in data["results"]] == [True, False, True]
+        assert data["results"][0]["text"] == "first"
+        assert data["results"][2]["text"] == "third"
+        assert data["successful_count"] == 2
+
+    def test_upload_imgs_without_combined(self, client, ocr_available):
+        """测试 include_combined=false 时不返回合并文本，但仍给出合并长度"""
+        files = [
+            ("files", ("a.png", _png("abc"), "image/png")),
+            ("files", ("b.png", _png("de"), "image/png")),
+        ]
+
+        response = client.post("/api/upload/imgs", params={"include_combined": False}, files=files)
+
+        data = response.json()
+        assert data["combined_text"] is None
+        assert data["combined_length"] == len("abc\nde")
+
+    def test_upload_imgs_too_large(self, client, ocr_available, monkeypatch):
+        """测试请求体超过批量上限时返回 413"""
+        monkeypatch.setattr(api, "_MAX_BATCH_BYTES", 64)
+        files = [("files", (f"{i}.png", _png("x" * 32), "image/png")) for i in range(3)]
+
+        response = client.post("/api/upload/imgs", files=files)
+
+        assert response.status_code == 413
+
+
+class TestUploadText:
+    """文本解析接口测试"""
+
+    def test_upload_text_cache_header(self, client):
+        """测试相同文本第二次提交命中缓存"""
+        payload = {"text": f"明天下午两点 开会 {uuid.uuid4().hex}"}
+
+        first = client.post("/api/upload/text", json=payload)
+        second = client.post("/api/upload/text", json=payload)
+
+        assert first.status_code == 200
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+        assert second.json()["events"] == first.json()["events"]
+
+    def test_upload_text_too_long(self, client):
+        """测试超长文本返回 422"""
+        response = client.post("/api/upload/text", json={"text": "a" * 10001})
+
+        assert response.status_code == 422
+
+    def test_upload_text_invalid_timezone(self, client):
+        """测试无效时区返回 400"""
+        response = client.post("/api/upload/text", json={"text": "明天开会", "timezone": "Mars/Base"})
+
+        assert response.status_code == 400
+
+
+class TestDownloadICS:
+    """ICS 下载接口测试"""
+
+    @staticmethod
+    def _payload(title: str) -> dict:
+        return {"events": [{
+            "title": title,
+            "start_time": "2025-10-26T14:00:00",
+            "end_time": "2025-10-26T16:00:00",
+        }]}
+
+    def test_download_ics_etag_and_cache(self, client):
+        """测试相同事件得到相同 ETag，重复下载 (即使带 If-None-Match) 返回完整日历"""
+        payload = self._payload(f"会议 {uuid.uuid4().hex}")
+
+        first = client.post("/api/download_ics", json=payload)
+        second = client.post(
+            "/api/download_ics", json=payload, headers={"If-None-Match": first.headers["ETag"]}
+        )
+
+        assert first.status_code == second.status_code == 200
+        assert first.headers["ETag"] == second.headers["ETag"]
+        assert first.headers["content-type"].startswith("text/calendar")
+        assert b"BEGIN:VEVENT" in second.content
+        # UID 与 DTSTAMP 随生成变化，相同内容说明第二次来自缓存
+        assert second.content == first.content
+
+    def test_download_ics_large_calendar_not_cached(self, client, monkeypatch):
+        """测试超过缓存字节上限的日历不进入缓存"""
+        monkeypatch.setattr(api, "_ICS_CACHE_MAX_BYTES", 64)
+        payload = self._payload(f"会议 {uuid.uuid4().hex}")
+
+        first = client.post("/api/download_ics", json=payload)
+        second = client.post("/api/download_ics", json=payload)
+
+        assert first.status_code == second.status_code == 200
+        assert second.content != first.content
+
+    def test_download_ics_invalid_datetime(self, client):
+        """测试无效时间返回 422"""
+        payload = self._payload("会议")
+        payload["events"][0]["start_time"] = "not a datetime"
+
+        response = client.post("/api/download_ics", json=payload)
+
+        assert response.status_code == 422
+
+
+class TestHealth:
+    """健康检查测试"""
+
+    def test_check_health(self, client):
+        """测试健康检查反映 Tesseract 可用性"""
+        with patch.object(OCRService, "is_tesseract_available", return_value=True):
+            response = client.get("/api/check_health")
+
+        assert response.json()["status"] == "healthy"
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
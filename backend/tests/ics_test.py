@@ -0,0 +1,129 @@
+"""
+ICS Service Unit Tests
+
+测试 ICSService 的核心功能，包括：
+- VCALENDAR / VEVENT 结构
+- 时间格式化
+- 文本转义与折行
+- 流式输出
+"""
+
+import pytest
+from datetime import datetime, timezone, timedelta
+
+from app.models.event import Event, EventPriority
+from app.services.ics_service import ICSService
+
+
+def _make_event(**kwargs) -> Event:
+    data = {
+        "title": "项目讨论",
+        "start_time": datetime(2025, 10, 26, 14, 0),
+        "end_time": datetime(2025, 10, 26, 16, 0),
+    }
+    data.update(kwargs)
+    return Event(**data)
+
+
+class TestGenerateICS:
+    """ICS 生成测试"""
+
+    def test_generate_ics_structure(self):
+        """测试日历和事件的基本结构"""
+        service = ICSService()
+        content = service.generate_ics([_make_event(location="会议室A")])
+        
+        lines = content.split("\r\n")
+        assert lines[0] == "BEGIN:VCALENDAR"
+        assert "VERSION:2.0" in lines
+        assert "BEGIN:VEVENT" in lines
+        assert "DTSTART:20251026T140000" in lines
+        assert "DTEND:20251026T160000" in lines
+        assert "SUMMARY:项目讨论" in lines
+        assert "LOCATION:会议室A" in lines
+        assert lines[-2] == "END:VCALENDAR"
+        assert lines[-1] == ""
+
+    def test_generate_ics_multiple_events(self):
+        """测试多个事件"""
+        service = ICSService()
+        events = [_make_event(title=f"会议{i}") for i in range(3)]
+        content = service.generate_ics(events)
+        
+        assert content.count("BEGIN:VEVENT") == 3
+        assert content.count("END:VEVENT") == 3
+
+    def test_generate_ics_iter_chunks(self):
+        """测试流式输出：头部、每个事件、尾部各一块"""
+        service = ICSService()
+        chunks = list(service.generate_ics_iter([_make_event(), _make_event()]))
+        
+        assert len(chunks) == 4
+        assert all(isinstance(chunk, bytes) for chunk in chunks)
+        assert chunks[0].startswith(b"BEGIN:VCALENDAR\r\n")
+        assert chunks[-1] == b"END:VCALENDAR\r\n"
+
+    def test_all_day_event(self):
+        """测试全天事件使用 DATE 值"""
+        service = ICSService()
+        event = _make_event(
+            start_time=datetime(2025, 10, 27, 0, 0),
+            end_time=datetime(2025, 10, 27, 23, 59)
+        )
+        content = service.generate_ics([event])
+        
+        assert "DTSTART;VALUE=DATE:20251027" in content
+        assert "DTEND;VALUE=DATE:20251028" in content
+
+    def test_priority_and_reminder(self):
+        """测试优先级和提醒"""
+        service = ICSService()
+        event = _make_event(priority=EventPriority.HIGH, reminder_minutes=15)
+        content = service.generate_ics([event])
+        
+        assert "PRIORITY:1" in content
+        assert "BEGIN:VALARM" in content
+        assert "TRIGGER:-PT15M" in content
+
+
+class TestFormatting:
+    """格式化测试"""
+
+    def test_format_naive_datetime(self):
+        """测试无时区时间保持浮动时间"""
+        assert ICSService._format_datetime(datetime(2025, 1, 2, 3, 4, 5)) == "20250102T030405"
+
+    def test_format_aware_datetime(self):
+        """测试带时区时间转换为 UTC"""
+        dt = datetime(2025, 1, 2, 10, 0, tzinfo=timezone(timedelta(hours=8)))
+        assert ICSService._format_datetime(dt) == "20250102T020000Z"
+
+    @pytest.mark.parametrize("text,expected", [
+        ("", ""),
+        ("plain", "plain"),
+        ("a,b;c", "a\\,b\\;c"),
+        ("back\\slash", "back\\\\slash"),
+        ("line1\nline2", "line1\\nline2"),
+        ("line1\r\nline2", "line1\\nline2"),
+        ("line1\rline2", "line1\\nline2"),
+        ("a\r\r\nb", "a\\n\\nb"),
+        ("\\,", "\\\\\\,"),
+    ])
+    def test_escape_text(self, text, expected):
+        """测试 TEXT 值转义"""
+        assert ICSService._escape_text(text) == expected
+
+    def test_fold_long_line(self):
+        """测试长行按 75 字节折行且不拆分多字节字符"""
+        line = "SUMMARY:" + "会议" * 40
+        folded = ICSService._fold_line(line)
+        
+        parts = folded.split("\r\n")
+        assert len(parts) > 1
+        assert all(len(part.encode("utf-8")) <= 75 for part in parts)
+        assert all(part.startswith(" ") for part in parts[1:])
+        assert "".join(p[1:] if i else p for i, p in enumerate(parts)) == line
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])
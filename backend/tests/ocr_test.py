@@ -12,6 +12,7 @@ import pytest
 import logging
 from pathlib import Path
 from unittest.mock import Mock, patch, MagicMock
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 from PIL import Image
 
@@ -38,11 +39,20 @@ class TestOCRServiceInitialization:
         service = OCRService(lang='eng')
         assert service.lang == 'eng'
 
+    def test_build_config(self):
+        """测试默认 Tesseract 参数及按请求覆盖"""
+        service = OCRService()
+        assert service.build_config() == '--oem 1 --psm 6'
+        assert service.build_config(psm=7) == '--oem 1 --psm 7'
+        assert service.build_config(oem=3) == '--oem 3 --psm 6'
+
     def test_get_ocr_service_singleton(self):
         """测试 OCRService 单例模式"""
         service1 = get_ocr_service()
         service2 = get_ocr_service()
         assert service1 is service2
+        assert get_ocr_service('chi_sim+eng') is service1
+        assert get_ocr_service(None) is service1
 
 
 class TestTesseractAvailability:
@@ -70,6 +80,43 @@ class TestTesseractAvailability:
         assert result is False
 
 
+    @patch('pytesseract.get_tesseract_version')
+    def test_is_tesseract_available_cached(self, mock_version):
+        """测试可用性检查结果被缓存，refresh 时重新检测"""
+        mock_version.return_value = 'tesseract 5.3.4'
+        
+        service = OCRService()
+        assert service.is_tesseract_available() is True
+        assert service.is_tesseract_available() is True
+        mock_version.assert_called_once()
+        
+        mock_version.side_effect = Exception('Tesseract not found')
+        assert service.is_tesseract_available(refresh=True) is False
+        assert mock_version.call_count == 2
+
+    @patch('pytesseract.image_to_string')
+    def test_warm_up(self, mock_ocr):
+        """测试预热调用一次 tesseract，失败时不抛出异常"""
+        service = OCRService()
+        service.warm_up()
+        mock_ocr.assert_called_once()
+        
+        mock_ocr.side_effect = Exception('Tesseract not found')
+        service.warm_up()
+
+    @patch('pytesseract.get_tesseract_version')
+    def test_is_tesseract_available_expires(self, mock_version):
+        """测试可用性缓存过期后重新检测"""
+        mock_version.return_value = 'tesseract 5.3.4'
+        
+        service = OCRService()
+        assert service.is_tesseract_available() is True
+        
+        service._available_at -= OCRService.AVAILABILITY_TTL
+        assert service.is_tesseract_available() is True
+        assert mock_version.call_count == 2
+
+
 class TestLanguageSupport:
     """语言支持测试"""
 
@@ -95,6 +142,19 @@ class TestLanguageSupport:
         
         assert languages == []
 
+    @patch('pytesseract.get_languages')
+    def test_get_available_languages_cached(self, mock_langs):
+        """测试语言列表缓存，refresh 时重新获取"""
+        mock_langs.return_value = ['chi_sim', 'eng']
+        
+        service = OCRService()
+        assert service.get_available_languages() == ['chi_sim', 'eng']
+        assert service.get_available_languages() == ['chi_sim', 'eng']
+        assert mock_langs.call_count == 1
+        
+        service.get_available_languages(refresh=True)
+        assert mock_langs.call_count == 2
+
 
 class TestExtractTextFromImage:
     """从图片文件提取文本测试"""
@@ -152,7 +212,7 @@ class TestExtractTextFromImage:
             with pytest.raises(Exception) as exc_info:
                 service.extract_text_from_image('test.png')
             
-            assert 'OCR 识别失败' in str(exc_info.value)
+            assert 'OCR recognize failed' in str(exc_info.value)
 
 
 class TestExtractTextFromBytes:
@@ -220,7 +280,225 @@ class TestExtractTextFromBytes:
         with pytest.raises(Exception) as exc_info:
             service.extract_text_from_bytes(image_bytes)
         
-        assert 'OCR 识别失败' in str(exc_info.value)
+        assert 'OCR recognize failure' in str(exc_info.value)
+
+
+class TestExtractTextFromFile:
+    """从文件对象提取文本测试"""
+
+    @patch('pytesseract.image_to_string')
+    def test_extract_text_from_file_success(self, mock_ocr):
+        """测试从文件对象（如上传的临时文件）提取文本"""
+        img = Image.new('RGB', (100, 100), color='white')
+        img_file = BytesIO()
+        img.save(img_file, format='PNG')
+        img_file.seek(0)
+        
+        mock_ocr.return_value = '  File Result  '
+        
+        service = OCRService()
+        result = service.extract_text_from_file(img_file)
+        
+        assert result == 'File Result'
+        mock_ocr.assert_called_once()
+
+    @patch('pytesseract.image_to_string')
+    def test_extract_text_from_file_cached(self, mock_ocr):
+        """测试相同图片内容命中缓存，不再调用 tesseract"""
+        img = Image.new('RGB', (100, 100), color='white')
+        img_bytes = BytesIO()
+        img.save(img_bytes, format='PNG')
+        image_bytes = img_bytes.getvalue()
+        
+        mock_ocr.return_value = 'Cached Result'
+        
+        service = OCRService()
+        first = service.extract_text_from_bytes(image_bytes)
+        second = service.extract_text_from_bytes(image_bytes)
+        
+        assert first == second == 'Cached Result'
+        mock_ocr.assert_called_once()
+
+    @patch('pytesseract.image_to_string')
+    def test_extract_text_from_file_preprocessed(self, mock_ocr):
+        """测试识别前转换为灰度图并缩小超大图片"""
+        img = Image.new('RGB', (4800, 1200), color='white')
+        img_file = BytesIO()
+        img.save(img_file, format='PNG')
+        img_file.seek(0)
+        
+        mock_ocr.return_value = 'Result'
+        
+        service = OCRService()
+        service.extract_text_from_file(img_file)
+        
+        image = mock_ocr.call_args[0][0]
+        assert image.mode == 'L'
+        assert image.size == (2400, 600)
+        assert image.format == 'BMP'
+
+    @patch('pytesseract.image_to_string')
+    def test_extract_text_from_file_binarized(self, mock_ocr):
+        """测试开启二值化后以 Otsu 阈值输出黑白图"""
+        img = Image.new('L', (100, 100), color=200)
+        img.paste(60, (0, 0, 100, 30))
+        img_file = BytesIO()
+        img.save(img_file, format='PNG')
+        img_file.seek(0)
+        
+        mock_ocr.return_value = 'Result'
+        
+        service = OCRService(binarize=True)
+        service.extract_text_from_file(img_file)
+        
+        image = mock_ocr.call_args[0][0]
+        assert image.mode == '1'
+        assert image.getpixel((0, 0)) == 0
+        assert image.getpixel((0, 99)) == 255
+
+    @patch('pytesseract.image_to_string')
+    def test_extract_text_from_file_transparent_png(self, mock_ocr):
+        """测试透明 PNG 铺在白底上识别，透明区域不会变成黑色"""
+        img = Image.new('RGBA', (100, 100), color=(0, 0, 0, 0))
+        img.paste((0, 0, 0, 255), (0, 0, 100, 30))
+        img_file = BytesIO()
+        img.save(img_file, format='PNG')
+        img_file.seek(0)
+        
+        mock_ocr.return_value = 'Result'
+        
+        service = OCRService()
+        service.extract_text_from_file(img_file)
+        
+        image = mock_ocr.call_args[0][0]
+        assert image.mode == 'L'
+        assert image.getpixel((0, 0)) == 0
+        assert image.getpixel((0, 99)) == 255
+
+    def test_otsu_threshold(self):
+        """测试 Otsu 阈值落在两个峰之间"""
+        histogram = [0] * 256
+        histogram[40] = 300
+        histogram[210] = 700
+        
+        assert 40 <= OCRService._otsu_threshold(histogram) < 210
+
+    @patch('pytesseract.image_to_string')
+    def test_extract_text_from_file_jpeg_draft(self, mock_ocr):
+        """测试 JPEG 以缩小的灰度草稿模式解码"""
+        img = Image.new('RGB', (9600, 2400), color='white')
+        img_file = BytesIO()
+        img.save(img_file, format='JPEG')
+        img_file.seek(0)
+        
+        mock_ocr.return_value = 'Result'
+        
+        service = OCRService()
+        service.extract_text_from_file(img_file)
+        
+        image = mock_ocr.call_args[0][0]
+        assert image.mode == 'L'
+        assert image.size == (2400, 600)
+        assert image.format == 'BMP'
+
+    @patch('pytesseract.image_to_string')
+    def test_extract_text_from_file_thin_jpeg(self, mock_ocr):
+        """测试极窄的 JPEG 缩小后尺寸不为 0"""
+        img = Image.new('RGB', (9600, 3), color='white')
+        img_file = BytesIO()
+        img.save(img_file, format='JPEG')
+        img_file.seek(0)
+        
+        mock_ocr.return_value = 'Result'
+        
+        service = OCRService()
+        assert service.extract_text_from_file(img_file) == 'Result'
+        
+        image = mock_ocr.call_args[0][0]
+        assert image.mode == 'L'
+        assert max(image.size) <= 2400
+        assert min(image.size) >= 1
+
+    def test_extract_text_from_file_invalid_image(self):
+        """测试文件对象中不是有效图片"""
+        service = OCRService()
+        
+        with pytest.raises(Exception):
+            service.extract_text_from_file(BytesIO(b'invalid image data'))
+
+
+class TestExtractTextFromList:
+    """单次 tesseract 调用批量识别测试"""
+
+    @patch('pytesseract.image_to_string')
+    def test_extract_text_from_list_splits_pages(self, mock_ocr):
+        """测试按换页符拆分每张图片的识别结果"""
+        mock_ocr.return_value = ' first \x0c\x0csecond\x0c'
+        
+        service = OCRService()
+        result = service.extract_text_from_list(['a.png', 'b.png', 'c.png'])
+        
+        assert result == ['first', '', 'second']
+        mock_ocr.assert_called_once()
+
+    @patch('pytesseract.image_to_string')
+    def test_extract_text_from_list_page_mismatch(self, mock_ocr):
+        """测试输出页数与图片数量不一致时抛出异常"""
+        mock_ocr.return_value = 'only one\x0c'
+        
+        service = OCRService()
+        with pytest.raises(Exception):
+            service.extract_text_from_list(['a.png', 'b.png'])
+
+    @patch('app.services.ocr_service.tesserocr')
+    def test_extract_text_from_files_with_tesserocr(self, mock_tesserocr):
+        """测试安装 tesserocr 时批量图片共用会话池中的会话"""
+        api = mock_tesserocr.PyTessBaseAPI.return_value
+        api.GetUTF8Text.side_effect = [' first ', 'second\n', 'third']
+        
+        image_files = []
+        for color in ('white', 'black', 'gray'):
+            img_file = BytesIO()
+            Image.new('RGB', (100, 100), color=color).save(img_file, format='PNG')
+            img_file.seek(0)
+            image_files.append(img_file)
+        
+        service = OCRService()
+        result = service.extract_text_from_files(image_files[:2])
+        
+        assert result == ['first', 'second']
+        assert service.extract_text_from_file(image_files[2]) == 'third'
+        # 会话只创建一次，后续调用复用
+        mock_tesserocr.PyTessBaseAPI.assert_called_once_with(lang='chi_sim+eng', psm=6, oem=1)
+        assert api.SetImage.call_count == 3
+
+    @patch('app.services.ocr_service.tesserocr')
+    def test_tesserocr_sessions_capped(self, mock_tesserocr, monkeypatch):
+        """测试多个线程并发识别时会话数不超过 OCR_TESS_SESSIONS"""
+        monkeypatch.setenv('OCR_TESS_SESSIONS', '2')
+        created = []
+        
+        def new_session(**kwargs):
+            api = MagicMock()
+            api.GetUTF8Text.return_value = 'text'
+            created.append(api)
+            return api
+        
+        mock_tesserocr.PyTessBaseAPI.side_effect = new_session
+        
+        images = []
+        for i in range(16):
+            img_file = BytesIO()
+            Image.new('L', (20, 20), color=i * 10).save(img_file, format='PNG')
+            img_file.seek(0)
+            images.append(img_file)
+        
+        service = OCRService()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(service.extract_text_from_file, images))
+        
+        assert results == ['text'] * 16
+        assert 1 <= len(created) <= 2
 
 
 class TestGetImageInfo:
@@ -380,7 +658,7 @@ class TestErrorHandling:
             with pytest.raises(Exception) as exc_info:
                 service.extract_text_from_image('test.png')
             
-            assert 'OCR 识别失败' in str(exc_info.value)
+            assert 'OCR recognize failed' in str(exc_info.value)
 
     def test_extract_with_corrupted_bytes(self):
         """测试损坏的图片字节流"""
@@ -0,0 +1,248 @@
+"""
+Parser Service Unit Tests
+
+测试 ParserService 的核心功能，包括：
+- 日期、时间、时长提取
+- 地点和标题提取
+- 多事件切分
+- 时区处理
+"""
+
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from time import perf_counter
+from zoneinfo import ZoneInfo
+
+from app.services import parser_service
+from app.services.parser_service import ParserService, parse_text_cached
+
+TODAY = date(2025, 10, 15)
+
+
+@pytest.fixture
+def service():
+    return ParserService()
+
+
+class TestParseDate:
+    """日期提取测试"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("2024年10月28日", date(2024, 10, 28)),
+        ("2024-10-28", date(2024, 10, 28)),
+        ("10月28日 开会", date(2025, 10, 28)),
+        ("10/28", date(2025, 10, 28)),
+        ("明天", date(2025, 10, 16)),
+        ("大后天", date(2025, 10, 18)),
+        ("没有日期", None),
+        ("2月30日", None),
+    ])
+    def test_parse_simple_date(self, service, text, expected):
+        """测试常见日期写法"""
+        assert service.parse_simple_date(text, TODAY) == expected
+
+    def test_dateparser_only_for_relative_weekdays(self, service, monkeypatch):
+        """测试正则能识别时不调用 dateparser，相对星期才交给 dateparser"""
+        calls = []
+
+        def fake_search_dates(text, languages, settings):
+            calls.append(text)
+            return [("下周三", datetime(2025, 10, 22))]
+
+        monkeypatch.setattr(parser_service, "_dateparser_search", fake_search_dates)
+
+        assert service.parse_date_with_dateparser("明天 开会", TODAY) == date(2025, 10, 16)
+        assert service.parse_date_with_dateparser("开会", TODAY) is None
+        assert calls == []
+        assert service.parse_date_with_dateparser("下周三 开会", TODAY) == date(2025, 10, 22)
+        assert calls == ["下周三 开会"]
+
+    def test_dateparser_not_installed(self, service, monkeypatch):
+        """测试未安装 dateparser 时相对星期返回 None"""
+        monkeypatch.setattr(parser_service, "_dateparser_search", False)
+
+        assert service.parse_date_with_dateparser("下周三 开会", TODAY) is None
+
+
+class TestExtractTime:
+    """时间和时长提取测试"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("14:00-16:00", (time(14, 0), time(16, 0))),
+        ("下午2点到4点", (time(14, 0), time(16, 0))),
+        ("下午两点", (time(14, 0), None)),
+        ("上午10点半", (time(10, 30), None)),
+        ("晚上八点15分", (time(20, 15), None)),
+        ("晚上12点", (time(0, 0), None)),
+        ("晚上0点", (time(0, 0), None)),
+        ("凌晨十二点半", (time(0, 30), None)),
+        ("中午12点", (time(12, 0), None)),
+        ("晚上10点到12点", (time(22, 0), time(0, 0))),
+        ("没有时间", None),
+    ])
+    def test_extract_time_range(self, service, text, expected):
+        """测试时间段和单个时间"""
+        assert service.extract_time_range(text) == expected
+
+    @pytest.mark.parametrize("text,expected", [
+        ("2小时", timedelta(hours=2)),
+        ("1.5个小时", timedelta(hours=1.5)),
+        ("30分钟", timedelta(minutes=30)),
+        ("很快", None),
+    ])
+    def test_extract_duration(self, service, text, expected):
+        """测试时长"""
+        assert service.extract_duration(text) == expected
+
+
+class TestExtractLocationAndTitle:
+    """地点和标题提取测试"""
+
+    @pytest.mark.parametrize("text,expected", [
+        ("地点：会议室 A", "会议室 A"),
+        ("明天在三楼会议室开会", "三楼会议室"),
+        ("14:00 报告厅B", "报告厅B"),
+        ("没有地点", None),
+    ])
+    def test_extract_location(self, service, text, expected):
+        """测试地点"""
+        assert service.extract_location(text) == expected
+
+    def test_extract_title(self, service):
+        """测试标题去掉日期时间和地点，整句都被去掉时顺延到下一句"""
+        assert service.extract_title(["项目评审 10月28日 14:00-16:00"]) == "项目评审"
+        assert service.extract_title(["明天下午两点在会议室A开会"]) == "开会"
+        assert service.extract_title(["10月28日", "团队会议"]) == "团队会议"
+        assert service.extract_title(["10月28日"]) == "未命名事件"
+
+
+class TestParseEvents:
+    """完整解析测试"""
+
+    def test_parse_multiline_event(self, service):
+        """测试多行 OCR 文本合并为一个事件"""
+        text = "团队会议\n2024年10月28日\n14:00-16:00\n会议室A"
+        events = service.parse_multiple_events(text, TODAY)
+
+        assert len(events) == 1
+        event = events[0]
+        assert event.title == "团队会议"
+        assert event.start_time == datetime(2024, 10, 28, 14, 0)
+        assert event.end_time == datetime(2024, 10, 28, 16, 0)
+        assert event.location == "会议室A"
+
+    def test_parse_multiple_events(self, service):
+        """测试出现新日期时切分为多个事件"""
+        text = "周会 10月20日 上午10点 2小时。评审 10月21日 下午3点到5点 在报告厅举行"
+        events = service.parse_multiple_events(text, TODAY)
+
+        assert [e.title for e in events] == ["周会", "评审"]
+        assert events[0].end_time == datetime(2025, 10, 20, 12, 0)
+        assert events[1].location == "报告厅"
+
+    def test_parse_range_to_midnight(self, service):
+        """测试到晚上12点结束的事件结束于次日零点"""
+        event = service.parse_multiple_events("跨年晚会 12月31日 晚上10点到12点", TODAY)[0]
+
+        assert event.start_time == datetime(2025, 12, 31, 22, 0)
+        assert event.end_time == datetime(2026, 1, 1, 0, 0)
+
+    @pytest.mark.parametrize("text,expected", [
+        ("明天晚上12点睡觉", datetime(2025, 10, 17, 0, 0)),
+        ("明天晚上0点睡觉", datetime(2025, 10, 17, 0, 0)),
+        ("明天凌晨12点出发", datetime(2025, 10, 16, 0, 0)),
+        ("明天中午12点吃饭", datetime(2025, 10, 16, 12, 0)),
+    ])
+    def test_parse_midnight_start(self, service, text, expected):
+        """测试晚上12点 (0点) 是当天结束时的午夜，凌晨12点是当天开始时的午夜"""
+        event = service.parse_multiple_events(text, TODAY)[0]
+
+        assert event.start_time == expected
+        assert event.end_time == expected + timedelta(hours=1)
+
+    @pytest.mark.parametrize("text", [
+        "9999年12月31日 晚上11点到1点",
+        "9999年12月31日 晚上12点",
+        "9999年12月31日 23:00 2小时",
+    ])
+    def test_parse_out_of_range_skipped(self, service, text):
+        """测试结束时间超出 datetime 范围的事件被跳过，而不是抛出 OverflowError"""
+        assert service.parse_multiple_events(text, TODAY) == []
+
+    def test_parse_huge_duration(self, service):
+        """测试过大的时长不会导致溢出"""
+        event = service.parse_multiple_events("明天10点 开会 持续 300000000小时", TODAY)[0]
+
+        assert event.start_time == datetime(2025, 10, 16, 10, 0)
+        assert event.end_time > event.start_time
+
+    def test_parse_all_day_event(self, service):
+        """测试只有日期时为全天事件"""
+        event = service.parse_multiple_events("运动会 11月3日", TODAY)[0]
+
+        assert event.is_all_day()
+
+    def test_parse_no_event(self, service):
+        """测试没有日期和时间的文本不产生事件"""
+        assert service.parse_multiple_events("随便写点什么", TODAY) == []
+
+    def test_parse_with_timezone(self, service):
+        """测试指定时区时事件时间带时区"""
+        event = service.parse_text_to_events("10月28日 14:00 开会", timezone="Asia/Shanghai")[0]
+
+        assert event.start_time.tzinfo == ZoneInfo("Asia/Shanghai")
+
+    @pytest.mark.parametrize("text", [
+        "a" + " " * 8000 + "b",
+        "下午" + " " * 8000 + "开会",
+        "10月28日 开会" + "，" * 8000 + "x",
+        "明天 " + "在" * 9990,
+        "明天 " + "10" * 4995,
+    ])
+    def test_parse_long_runs_linear(self, service, text):
+        """测试长空白、标点、"在" 或数字串不会触发正则回溯 (原实现约需数秒)"""
+        started = perf_counter()
+        service.parse_multiple_events(text, TODAY)
+        assert perf_counter() - started < 0.5
+
+    def test_parse_invalid_timezone(self, service):
+        """测试无效时区"""
+        with pytest.raises(ValueError):
+            service.parse_text_to_events("明天开会", timezone="Mars/Base")
+
+
+class TestParseCache:
+    """解析缓存测试"""
+
+    def test_cache_keyed_by_day(self):
+        """测试相对日期按当天日期缓存，跨天不会返回旧结果"""
+        first, first_hit = parse_text_cached("明天 14:00 开会", None, TODAY)
+        again, again_hit = parse_text_cached("明天 14:00 开会", None, TODAY)
+        next_day, next_day_hit = parse_text_cached("明天 14:00 开会", None, TODAY + timedelta(days=1))
+
+        assert again is first
+        assert (first_hit, again_hit, next_day_hit) == (False, True, False)
+        assert first[0].start_time == datetime(2025, 10, 16, 14, 0)
+        assert next_day[0].start_time == datetime(2025, 10, 17, 14, 0)
+
+    def test_cache_hit_reported_per_call(self):
+        """测试并发时命中与否按每次调用判断，不受其他线程命中的影响"""
+        parse_text_cached("10月28日 14:00 开会", None, TODAY)
+
+        def fresh(i):
+            return parse_text_cached(f"10月28日 14:00 新会议{i}", None, TODAY)[1]
+
+        def cached(i):
+            return parse_text_cached("10月28日 14:00 开会", None, TODAY)[1]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            fresh_hits = [pool.submit(fresh, i) for i in range(50)]
+            cached_hits = [pool.submit(cached, i) for i in range(50)]
+
+        assert not any(f.result() for f in fresh_hits)
+        assert all(f.result() for f in cached_hits)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v', '--tb=short'])